@@ -0,0 +1,4 @@
+"""Benchmarks for the Z-Wave MQTT integration.
+
+Run a benchmark from the repository root, e.g. `python -m benchmarks.value_dispatch`.
+"""
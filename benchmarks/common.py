@@ -0,0 +1,49 @@
+"""Helpers for the benchmarks."""
+from pathlib import Path
+import re
+from types import SimpleNamespace
+
+FIXTURE = (
+    Path(__file__).parent.parent / "tests" / "fixtures" / "generic_network_dump.csv"
+)
+
+
+def load_dump(fixture=FIXTURE):
+    """Load a network dump as a list of (topic, payload) tuples."""
+    messages = []
+    with fixture.open("rt") as fp:
+        for line in fp:
+            topic, payload = line.strip().split(",", 1)
+            messages.append((topic, payload))
+    return messages
+
+
+NODE_ID_OFFSET = 1000
+RE_TOPIC_NODE_ID = re.compile(r"/node/(\d+)/")
+RE_PAYLOAD_NODE_ID = re.compile(r'"(Node|NodeID)": (\d+)')
+
+
+def scale_dump(messages, copies):
+    """Replicate the nodes of a network dump under new node ids."""
+    scaled = list(messages)
+    for copy in range(1, copies):
+        offset = copy * NODE_ID_OFFSET
+        for topic, payload in messages:
+            if "/node/" not in topic:
+                continue
+            scaled.append(
+                (
+                    RE_TOPIC_NODE_ID.sub(
+                        lambda match: f"/node/{int(match[1]) + offset}/", topic
+                    ),
+                    RE_PAYLOAD_NODE_ID.sub(
+                        lambda match: f'"{match[1]}": {int(match[2]) + offset}', payload
+                    ),
+                )
+            )
+    return scaled
+
+
+def create_hass():
+    """Create a bare object to pass as hass outside of a running Home Assistant."""
+    return SimpleNamespace(data={})
@@ -0,0 +1,77 @@
+"""Benchmark the cost of decoding the payloads per topic family.
+
+Decodes the payloads of the network dump fixture with the json module (from
+str, from bytes and from bytes with the str round trip of a utf-8 MQTT
+subscription) and with orjson/ujson when they are installed.
+"""
+import json
+from time import perf_counter
+
+from benchmarks.common import load_dump
+from custom_components.zwave_mqtt.topics import compile_topic_trie, match_topic_family
+
+ROUNDS = 200
+TOPIC_PREFIX = "OpenZWave/"
+
+
+def get_decoders():
+    """Return the decoders to compare, a decoder takes the payload as bytes."""
+    decoders = {
+        "json (str)": None,
+        "json (bytes)": json.loads,
+        "json (utf-8 str)": lambda payload: json.loads(payload.decode("utf-8")),
+    }
+    for module in ("orjson", "ujson"):
+        try:
+            decoders[f"{module} (bytes)"] = __import__(module).loads
+        except ImportError:
+            pass
+    return decoders
+
+
+def group_payloads(messages):
+    """Return the non-empty payloads per topic family."""
+    trie = compile_topic_trie()
+    families = {}
+    for topic, payload in messages:
+        segments = tuple(topic[len(TOPIC_PREFIX) :].strip("/").split("/"))
+        family = match_topic_family(trie, segments) or "ignored"
+        if payload:
+            families.setdefault(family, []).append(payload)
+    return families
+
+
+def bench(decoder, payloads):
+    """Return the microseconds it takes to decode a payload on average."""
+    if decoder is None:
+        decoder = json.loads
+    else:
+        payloads = [payload.encode() for payload in payloads]
+    best = None
+    for _ in range(ROUNDS):
+        start = perf_counter()
+        for payload in payloads:
+            decoder(payload)
+        duration = perf_counter() - start
+        best = duration if best is None else min(best, duration)
+    return best / len(payloads) * 1e6
+
+
+def main():
+    """Run the benchmark."""
+    families = group_payloads(load_dump())
+    decoders = get_decoders()
+    print(f"{'family':>13} {'count':>6} {'avg size':>9}", end="")
+    for name in decoders:
+        print(f" {name:>17}", end="")
+    print("  (us/payload)")
+    for family, payloads in sorted(families.items()):
+        size = sum(len(payload) for payload in payloads) / len(payloads)
+        print(f"{family:>13} {len(payloads):>6} {size:>9.0f}", end="")
+        for decoder in decoders.values():
+            print(f" {bench(decoder, payloads):>17.2f}", end="")
+        print()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,147 @@
+"""Benchmark adding the entities of a network dump to the platforms.
+
+Compares adding every entity with its own async_add_entities call against
+adding the entities discovered together in one batch per platform.
+Requires Home Assistant to be installed.
+"""
+import asyncio
+from datetime import timedelta
+from importlib import import_module
+import logging
+import tempfile
+from time import perf_counter
+
+from benchmarks.common import create_hass, load_dump, scale_dump
+from custom_components.zwave_mqtt import PLATFORMS
+from custom_components.zwave_mqtt.const import (
+    DATA_AVAILABILITY,
+    DATA_STATE_WRITER,
+    DATA_UNSUBSCRIBE,
+    DATA_VALUE_DISPATCHER,
+    DOMAIN,
+)
+from custom_components.zwave_mqtt.discovery import get_matching_schemas
+from custom_components.zwave_mqtt.entity import (
+    ZWaveDeviceEntityValues,
+    ZWaveInstanceAvailability,
+    ZWaveNodeValueIndex,
+    ZWaveStateWriteScheduler,
+    ZWaveValueDispatcher,
+)
+from openzwavemqtt import OZWManager, OZWOptions
+from openzwavemqtt.const import EVENT_VALUE_ADDED
+
+from homeassistant import config_entries
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers.dispatcher import async_dispatcher_send
+from homeassistant.helpers.entity_platform import EntityPlatform
+
+COPIES = [1, 10, 40]
+_LOGGER = logging.getLogger(__name__)
+
+
+class DiscoveredValues:
+    """Collect the discovered values per platform instead of adding them."""
+
+    def __init__(self):
+        """Initialize the (empty) collection."""
+        self.components = {}
+
+    def async_add(self, component, values):
+        """Collect the values of a discovered entity."""
+        self.components.setdefault(component, []).append(values)
+
+
+def discover(messages):
+    """Run discovery on the messages and return the values per platform."""
+    options = OZWOptions(send_message=lambda topic, payload: None)
+    manager = OZWManager(options)
+    hass = create_hass()
+    discovered = DiscoveredValues()
+    value_indexes = {}
+
+    def value_added(value):
+        value_index = value_indexes.setdefault(value.node.id, ZWaveNodeValueIndex())
+        value_index.add(value)
+        for schema in get_matching_schemas(value.node, value):
+            ZWaveDeviceEntityValues(
+                hass, options, schema, value, value_index, discovered
+            ).setup()
+
+    options.listen(EVENT_VALUE_ADDED, value_added)
+    for topic, payload in messages:
+        manager.receive_message(topic, payload)
+
+    return discovered.components
+
+
+async def bench_add(discovered, batched):
+    """Return the seconds it takes to add all entities to their platform."""
+    hass = HomeAssistant()
+    hass.config.config_dir = tempfile.mkdtemp()
+    entry = config_entries.ConfigEntry(
+        1,
+        DOMAIN,
+        "Z-Wave",
+        {},
+        config_entries.SOURCE_USER,
+        config_entries.CONN_CLASS_LOCAL_PUSH,
+        {},
+    )
+
+    async def mark_platform_loaded(platform):
+        pass
+
+    hass.data[DOMAIN] = {
+        entry.entry_id: {
+            "mark_platform_loaded": mark_platform_loaded,
+            DATA_UNSUBSCRIBE: [],
+            DATA_VALUE_DISPATCHER: ZWaveValueDispatcher(),
+            DATA_STATE_WRITER: ZWaveStateWriteScheduler(hass),
+            DATA_AVAILABILITY: ZWaveInstanceAvailability(),
+        }
+    }
+    for component in PLATFORMS:
+        platform = EntityPlatform(
+            hass=hass,
+            logger=_LOGGER,
+            domain=component,
+            platform_name=DOMAIN,
+            platform=import_module(f"custom_components.{DOMAIN}.{component}"),
+            scan_interval=timedelta(seconds=30),
+            entity_namespace=None,
+        )
+        await platform.async_setup_entry(entry)
+
+    start = perf_counter()
+    for component, values_list in discovered.items():
+        signal = f"zwave_new_{component}_{entry.entry_id}"
+        if batched:
+            async_dispatcher_send(hass, signal, values_list)
+            continue
+        for values in values_list:
+            async_dispatcher_send(hass, signal, [values])
+    await hass.async_block_till_done()
+    duration = perf_counter() - start
+
+    await hass.async_stop(force=True)
+    return duration
+
+
+def main():
+    """Run the benchmark."""
+    messages = load_dump()
+    print(f"{'nodes':>8} {'entities':>10} {'per entity (ms)':>16} {'batched (ms)':>14}")
+    for copies in COPIES:
+        scaled = scale_dump(messages, copies)
+        nodes = len({topic.split("/")[3] for topic, _ in scaled if "/node/" in topic})
+        entities = sum(len(values) for values in discover(scaled).values())
+        per_entity = asyncio.run(bench_add(discover(scaled), batched=False))
+        batched = asyncio.run(bench_add(discover(scaled), batched=True))
+        print(
+            f"{nodes:>8} {entities:>10} {per_entity * 1e3:>16.1f} {batched * 1e3:>14.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+"""Benchmark the topic router against handing the messages to the manager.
+
+Replays the network dump fixture, replicated to more than 200 nodes, once to
+create all nodes and values and once more as a stream of updates, through
+OZWManager.receive_message and through the ZWaveTopicRouter.
+"""
+
+import gc
+from time import perf_counter
+
+from benchmarks.common import load_dump, scale_dump
+from custom_components.zwave_mqtt.router import ZWaveTopicRouter
+from openzwavemqtt import OZWManager, OZWOptions
+
+COPIES = 50
+ROUNDS = 5
+TOPIC_PREFIX = "OpenZWave/"
+
+
+def bench(messages, use_router):
+    """Return the messages per second of the initial replay and the updates."""
+    manager = OZWManager(
+        OZWOptions(send_message=lambda topic, payload: None, topic_prefix=TOPIC_PREFIX)
+    )
+    receive_message = manager.receive_message
+    if use_router:
+        receive_message = ZWaveTopicRouter(manager, TOPIC_PREFIX).async_route
+
+    rates = []
+    gc.collect()
+    gc.disable()
+    try:
+        for _ in range(2):
+            start = perf_counter()
+            for topic, payload in messages:
+                receive_message(topic, payload)
+            rates.append(len(messages) / (perf_counter() - start))
+    finally:
+        gc.enable()
+    return rates
+
+
+def main():
+    """Run the benchmark."""
+    messages = scale_dump(load_dump(), COPIES)
+    nodes = len({topic.split("/")[3] for topic, _ in messages if "/node/" in topic})
+    print(f"{len(messages)} messages of {nodes} nodes")
+    print(f"{'path':>10} {'replay (msg/s)':>16} {'updates (msg/s)':>16}")
+    for name, use_router in (("manager", False), ("router", True)):
+        # best of a few runs to reduce the noise
+        replay, updates = map(
+            max, zip(*(bench(messages, use_router) for _ in range(ROUNDS)))
+        )
+        print(f"{name:>10} {replay:>16.0f} {updates:>16.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""Benchmark the cost of dispatching a value change to the entities.
+
+Compares the (old) approach where every entity listens to all value changes
+and filters them itself against the per-value dispatch index.
+"""
+from timeit import timeit
+
+from custom_components.zwave_mqtt.entity import ZWaveValueDispatcher
+
+ENTITY_COUNTS = [10, 100, 1000, 5000]
+VALUES_PER_ENTITY = 3
+CHANGES = 10000
+
+
+class FakeValue:
+    """Minimal stand-in for an OZWValue."""
+
+    def __init__(self, value_id_key):
+        """Initialize the value."""
+        self.value_id_key = value_id_key
+
+
+class FakeEntity:
+    """Minimal stand-in for a ZWaveDeviceEntity."""
+
+    def __init__(self, values):
+        """Initialize the entity."""
+        self.values = values
+        self.updates = 0
+
+    def filter_value_changed(self, value):
+        """Handle a value change the old way, filtering every change."""
+        if value.value_id_key in (v.value_id_key for v in self.values if v):
+            self.updates += 1
+
+    def value_changed(self, value):
+        """Handle a value change routed by the dispatch index."""
+        self.updates += 1
+
+
+def create_entities(count):
+    """Create entities with unique values."""
+    return [
+        FakeEntity(
+            [
+                FakeValue(entity_idx * VALUES_PER_ENTITY + value_idx)
+                for value_idx in range(VALUES_PER_ENTITY)
+            ]
+        )
+        for entity_idx in range(count)
+    ]
+
+
+def bench_listeners(entities, changed):
+    """Return seconds per change when every entity filters all changes."""
+    listeners = [entity.filter_value_changed for entity in entities]
+
+    def run():
+        for value in changed:
+            for listener in listeners:
+                listener(value)
+
+    return timeit(run, number=1) / len(changed)
+
+
+def bench_dispatcher(entities, changed):
+    """Return seconds per change when using the dispatch index."""
+    dispatcher = ZWaveValueDispatcher()
+    for entity in entities:
+        for value in entity.values:
+            dispatcher.async_listen(value.value_id_key, entity.value_changed)
+
+    def run():
+        for value in changed:
+            dispatcher.async_dispatch(value)
+
+    return timeit(run, number=1) / len(changed)
+
+
+def main():
+    """Run the benchmark."""
+    print(f"{'entities':>10} {'listeners (us)':>16} {'dispatcher (us)':>16}")
+    for count in ENTITY_COUNTS:
+        entities = create_entities(count)
+        all_values = [value for entity in entities for value in entity.values]
+        changed = [all_values[idx % len(all_values)] for idx in range(CHANGES)]
+        # the old approach is way too slow to run all changes on large networks
+        listeners = bench_listeners(entities, changed[: max(10, CHANGES // count)])
+        dispatcher = bench_dispatcher(entities, changed)
+        print(f"{count:>10} {listeners * 1e6:>16.2f} {dispatcher * 1e6:>16.2f}")
+
+
+if __name__ == "__main__":
+    main()
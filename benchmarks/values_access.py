@@ -0,0 +1,129 @@
+"""Benchmark the value access and memory of ZWaveDeviceEntityValues.
+
+Compares the slotted values classes generated per schema against the (old)
+values object that kept the values in a dict and resolved every attribute
+through __getattr__.
+"""
+from timeit import timeit
+import tracemalloc
+
+from benchmarks.common import create_hass, load_dump
+from custom_components.zwave_mqtt.discovery import get_matching_schemas
+from custom_components.zwave_mqtt.entity import (
+    ZWaveDeviceEntityValues,
+    ZWaveEntityLoader,
+    ZWaveNodeValueIndex,
+)
+from openzwavemqtt import OZWManager, OZWOptions
+from openzwavemqtt.const import EVENT_VALUE_ADDED
+
+COPIES = 100
+ACCESSES = 1000000
+
+
+class DictValues:
+    """The values object as it was, the values stored in a dict."""
+
+    def __init__(self, hass, options, schema, primary_value, value_index, loader):
+        """Initialize the values object."""
+        self._hass = hass
+        self._entity_created = False
+        self._schema = schema
+        self._values = dict.fromkeys(schema.values)
+        self._value_index = value_index
+        self._loader = loader
+        self.options = options
+
+        self._values["primary"] = primary_value
+        self._node = primary_value.node
+        self._node_id = self._node.node_id
+        self._instance = primary_value.instance
+
+    def __getattr__(self, name):
+        """Get the specified value for this entity."""
+        return self._values.get(name, None)
+
+    def __iter__(self):
+        """Allow iteration over all values."""
+        return iter(self._values.values())
+
+    def __contains__(self, name):
+        """Check if the specified name/key exists in the values."""
+        return name in self._values
+
+
+def get_candidates():
+    """Return the arguments to create the values objects of the fixture with."""
+    hass = create_hass()
+    options = OZWOptions(send_message=lambda topic, payload: None)
+    manager = OZWManager(options)
+    loader = ZWaveEntityLoader(hass, "bench")
+    added = []
+    value_indexes = {}
+    options.listen(EVENT_VALUE_ADDED, added.append)
+
+    for topic, payload in load_dump():
+        manager.receive_message(topic, payload)
+
+    for value in added:
+        value_indexes.setdefault(value.node.id, ZWaveNodeValueIndex()).add(value)
+
+    return [
+        (hass, options, schema, value, value_indexes[value.node.id], loader)
+        for value in added
+        for schema in get_matching_schemas(value.node, value)
+    ]
+
+
+def measure_memory(values_class, candidates):
+    """Return the bytes allocated per values object."""
+    # create the classes of the schemas before measuring
+    for args in candidates:
+        values_class(*args)
+
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    values_objects = [values_class(*args) for _ in range(COPIES) for args in candidates]
+    size = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    return size / len(values_objects)
+
+
+def measure_access(values):
+    """Return the nanoseconds of the different kinds of access to the values."""
+    tests = {
+        "primary": "values.primary",
+        "optional": "values.dimming_duration",
+        "missing": "values.target",
+        "iterate": "for value in values: pass",
+        "contains": "'primary' in values",
+    }
+    return {
+        name: timeit(stmt, globals={"values": values}, number=ACCESSES) / ACCESSES * 1e9
+        for name, stmt in tests.items()
+    }
+
+
+def main():
+    """Run the benchmark."""
+    candidates = get_candidates()
+    # a light has a primary and an optional dimming duration value
+    light = next(args for args in candidates if args[2].component == "light")
+
+    print(f"{len(candidates) * COPIES} values objects of {len(candidates)} schemas")
+    results = {}
+    for name, values_class in (
+        ("dict", DictValues),
+        ("slots", ZWaveDeviceEntityValues),
+    ):
+        results[name] = measure_access(values_class(*light))
+        results[name]["bytes"] = measure_memory(values_class, candidates)
+
+    print(f"{'':>10}", *(f"{name:>10}" for name in results["dict"]))
+    for name, result in results.items():
+        print(f"{name:>10}", *(f"{value:>10.1f}" for value in result.values()))
+    print("(access in ns, memory in bytes per values object)")
+
+
+if __name__ == "__main__":
+    main()
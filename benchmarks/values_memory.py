@@ -0,0 +1,67 @@
+"""Benchmark the memory allocated for each ZWaveDeviceEntityValues.
+
+Replays the network dump fixture and creates the values objects for all
+discovered values, like async_value_added does.
+"""
+import copy
+import tracemalloc
+
+from benchmarks.common import create_hass, load_dump
+from custom_components.zwave_mqtt.discovery import get_matching_schemas
+from custom_components.zwave_mqtt.entity import (
+    ZWaveDeviceEntityValues,
+    ZWaveEntityLoader,
+    ZWaveNodeValueIndex,
+)
+from openzwavemqtt import OZWManager, OZWOptions
+from openzwavemqtt.const import EVENT_VALUE_ADDED
+
+
+def main():
+    """Run the benchmark."""
+    hass = create_hass()
+    options = OZWOptions(send_message=lambda topic, payload: None)
+    manager = OZWManager(options)
+    loader = ZWaveEntityLoader(hass, "bench")
+    added = []
+    value_indexes = {}
+    options.listen(EVENT_VALUE_ADDED, added.append)
+
+    for topic, payload in load_dump():
+        manager.receive_message(topic, payload)
+
+    for value in added:
+        value_indexes.setdefault(value.node.id, ZWaveNodeValueIndex()).add(value)
+
+    candidates = [
+        (schema, value)
+        for value in added
+        for schema in get_matching_schemas(value.node, value)
+    ]
+
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    values_objects = []
+    for schema, value in candidates:
+        values = ZWaveDeviceEntityValues(
+            hass, options, schema, value, value_indexes[value.node.id], loader
+        )
+        values.setup()
+        values_objects.append(values)
+    values_size = tracemalloc.get_traced_memory()[0] - before
+
+    # What every values object used to allocate on top: a copy of its schema
+    before = tracemalloc.get_traced_memory()[0]
+    schema_copies = [copy.deepcopy(schema.schema) for schema, _ in candidates]
+    copies_size = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+
+    count = len(values_objects)
+    print(f"values objects:                 {count}")
+    print(f"bytes per values object:        {values_size / count:.0f}")
+    print(f"bytes per (old) schema copy:    {copies_size / count:.0f}")
+    del schema_copies
+
+
+if __name__ == "__main__":
+    main()
@@ -6,6 +6,7 @@ import logging
 from openzwavemqtt import OZWManager, OZWOptions
 from openzwavemqtt.const import (
     EVENT_INSTANCE_EVENT,
+    EVENT_INSTANCE_STATUS_CHANGED,
     EVENT_NODE_ADDED,
     EVENT_NODE_CHANGED,
     EVENT_NODE_REMOVED,
@@ -26,15 +27,51 @@ from homeassistant.helpers.device_registry import async_get_registry as get_dev_
 from homeassistant.helpers.dispatcher import async_dispatcher_send
 
 from . import const
-from .const import DATA_UNSUBSCRIBE, DOMAIN, PLATFORMS, TOPIC_OPENZWAVE
-from .discovery import DISCOVERY_SCHEMAS, check_node_schema, check_value_schema
+from .const import (
+    DATA_AVAILABILITY,
+    DATA_COMMAND_COALESCER,
+    DATA_COMMAND_SCHEDULER,
+    DATA_DEVICE_INDEX,
+    DATA_DISCOVERY_GATE,
+    DATA_ENTITY_LOADER,
+    DATA_INGESTION_QUEUE,
+    DATA_MANAGER,
+    DATA_NODE_UPDATES,
+    DATA_NODES,
+    DATA_SNAPSHOT,
+    DATA_STATE_WRITER,
+    DATA_STATISTICS,
+    DATA_UNSUBSCRIBE,
+    DATA_VALUE_DISPATCHER,
+    DOMAIN,
+    PLATFORMS,
+    TOPIC_OPENZWAVE,
+)
+from .devices import ZWaveDeviceIndex, ZWaveNodeUpdateScheduler
+from .discovery import get_matching_schemas
 from .entity import (
     ZWaveDeviceEntityValues,
+    ZWaveDiscoveryGate,
+    ZWaveEntityLoader,
+    ZWaveInstanceAvailability,
+    ZWaveNodeValueIndex,
+    ZWaveStateWriteScheduler,
+    ZWaveValueDispatcher,
+    ZWaveValuesRegistry,
     create_device_id,
     create_device_name,
     create_value_id,
 )
+from .ingestion import ZWaveIngestionQueue, ZWavePayloadCache
+from .outbound import (
+    ZWaveCommandCoalescer,
+    ZWaveCommandLatencyTracker,
+    ZWaveCommandScheduler,
+)
+from .router import ZWaveTopicRouter
 from .services import ZWaveServices
+from .snapshot import ZWaveSnapshot, async_remove_snapshot
+from .topics import EVENT_TOPIC_MARKERS, STATISTICS_TOPIC_MARKERS, plan_subscriptions
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -45,6 +82,11 @@ DATA_DEVICES = "zwave-mqtt-devices"
 async def async_setup(hass: HomeAssistant, config: dict):
     """Initialize basic config of zwave_mqtt component."""
     hass.data[DOMAIN] = {}
+
+    # Register Services, they are shared by all config entries
+    services = ZWaveServices(hass)
+    services.register()
+
     return True
 
 
@@ -53,37 +95,149 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry):
 
     @callback
     def async_receive_message(msg):
-        manager.receive_message(msg.topic, msg.payload)
-
-    platforms_loaded = []
-
-    async def mark_platform_loaded(platform):
-        platforms_loaded.append(platform)
-
-        if len(platforms_loaded) != len(PLATFORMS):
+        if snapshot is not None:
+            snapshot.async_record(msg.topic, msg.payload)
+        if not msg.payload:
+            # the item and its children are removed, so forget their payloads
+            # before anything republished behind the removal is received
+            payload_cache.invalidate_prefix(msg.topic)
+        elif payload_cache.is_duplicate(msg.topic, msg.payload):
             return
+        ingestion_queue.async_put(msg.topic, msg.payload)
 
-        hass.data[DOMAIN][entry.entry_id][DATA_UNSUBSCRIBE].append(
-            await mqtt.async_subscribe(
-                hass, f"{TOPIC_OPENZWAVE}/#", async_receive_message
+    @callback
+    def async_remove_topic(topic):
+        # process an empty message to remove the topic's item from the manager
+        payload_cache.invalidate_prefix(topic)
+        ingestion_queue.async_put(topic, "")
+
+    @callback
+    def async_process_message(topic, payload):
+        if topic_router is not None:
+            topic_router.async_route(topic, payload)
+        else:
+            # an empty raw (bytes) payload removes the item as well
+            manager.receive_message(topic, payload or "")
+        if payload and topic.endswith("/status/"):
+            # the first status of an instance does not fire a changed event
+            instance_id = topic[len(topic_prefix) :].split("/", 1)[0]
+            ozw_instance = instance_id.isdigit() and manager.get_instance(
+                int(instance_id)
             )
-        )
+            if ozw_instance:
+                availability.async_status_changed(ozw_instance.get_status())
+
+    async def mark_platform_loaded(platform):
+        # add the entities that were discovered before the platform was loaded
+        entity_loader.async_platform_loaded(platform)
+
+    value_dispatcher = ZWaveValueDispatcher()
+    availability = ZWaveInstanceAvailability()
+    entity_loader = ZWaveEntityLoader(hass, entry.entry_id)
+    state_writer = ZWaveStateWriteScheduler(
+        hass,
+        coalesce=entry.options.get(
+            const.CONF_COALESCE_STATE_WRITES, const.DEFAULT_COALESCE_STATE_WRITES
+        ),
+        window=entry.options.get(
+            const.CONF_STATE_WRITE_WINDOW, const.DEFAULT_STATE_WRITE_WINDOW
+        ),
+        replay=entry.options.get(
+            const.CONF_SUPPRESS_REPLAY_WRITES, const.DEFAULT_SUPPRESS_REPLAY_WRITES
+        ),
+    )
 
     hass.data[DOMAIN][entry.entry_id] = {
         "mark_platform_loaded": mark_platform_loaded,
-        DATA_UNSUBSCRIBE: [],
+        DATA_UNSUBSCRIBE: [entry.add_update_listener(async_update_options)],
+        DATA_VALUE_DISPATCHER: value_dispatcher,
+        DATA_STATE_WRITER: state_writer,
+        DATA_AVAILABILITY: availability,
+        DATA_ENTITY_LOADER: entity_loader,
+        DATA_STATISTICS: {
+            "state_writes": state_writer,
+            "platforms": entity_loader,
+            "availability": availability,
+        },
     }
 
     data_nodes = {}
-    data_values = {}
+    data_values = ZWaveValuesRegistry()
+    data_value_index = {}
     removed_nodes = []
 
     @callback
-    def send_message(topic, payload):
+    def publish_message(topic, payload):
+        latency_tracker.async_command_sent(topic, payload)
         mqtt.async_publish(hass, topic, json.dumps(payload))
 
-    options = OZWOptions(send_message=send_message, topic_prefix=f"{TOPIC_OPENZWAVE}/")
+    latency_tracker = ZWaveCommandLatencyTracker()
+    hass.data[DOMAIN][entry.entry_id][DATA_STATISTICS]["latency"] = latency_tracker
+
+    # commands are published per node and priority within the rate limit
+    command_scheduler = ZWaveCommandScheduler(
+        hass,
+        publish_message,
+        rate=entry.options.get(const.CONF_COMMAND_RATE, const.DEFAULT_COMMAND_RATE),
+    )
+    # repeated commands for the same value are coalesced before scheduling
+    command_coalescer = ZWaveCommandCoalescer(
+        hass,
+        command_scheduler.async_send,
+        window=entry.options.get(
+            const.CONF_COMMAND_WINDOW, const.DEFAULT_COMMAND_WINDOW
+        ),
+    )
+    entry_data = hass.data[DOMAIN][entry.entry_id]
+    entry_data[DATA_COMMAND_COALESCER] = command_coalescer
+    entry_data[DATA_COMMAND_SCHEDULER] = command_scheduler
+    entry_data[DATA_STATISTICS]["commands"] = command_coalescer
+    entry_data[DATA_STATISTICS]["command_queue"] = command_scheduler
+
+    # every config entry serves (a set of instances of) its own OZW daemon
+    topic_prefix = f"{entry.data.get(const.CONF_TOPIC_PREFIX, TOPIC_OPENZWAVE)}/"
+    options = OZWOptions(
+        send_message=command_coalescer.async_send, topic_prefix=topic_prefix
+    )
     manager = OZWManager(options)
+    hass.data[DOMAIN][entry.entry_id][DATA_MANAGER] = manager
+    hass.data[DOMAIN][entry.entry_id][DATA_NODES] = data_nodes
+    topic_router = None
+    if entry.options.get(const.CONF_TOPIC_ROUTER, const.DEFAULT_TOPIC_ROUTER):
+        topic_router = ZWaveTopicRouter(manager, topic_prefix)
+        hass.data[DOMAIN][entry.entry_id][DATA_STATISTICS]["routes"] = topic_router
+    ingestion_queue = ZWaveIngestionQueue(hass, async_process_message)
+    payload_cache = ZWavePayloadCache(event_markers=EVENT_TOPIC_MARKERS)
+    hass.data[DOMAIN][entry.entry_id][DATA_INGESTION_QUEUE] = ingestion_queue
+    hass.data[DOMAIN][entry.entry_id][DATA_STATISTICS]["ingestion"] = ingestion_queue
+    hass.data[DOMAIN][entry.entry_id][DATA_STATISTICS]["duplicates"] = payload_cache
+
+    snapshot = None
+    if entry.options.get(const.CONF_WARM_START, const.DEFAULT_WARM_START):
+        snapshot = ZWaveSnapshot(
+            hass,
+            entry.entry_id,
+            async_remove_topic,
+            excluded_markers=EVENT_TOPIC_MARKERS + STATISTICS_TOPIC_MARKERS,
+        )
+        await snapshot.async_load()
+    hass.data[DOMAIN][entry.entry_id][DATA_SNAPSHOT] = snapshot
+
+    # the devices of the nodes (and their instances) in the device registry
+    device_index = ZWaveDeviceIndex(hass, entry.entry_id)
+    hass.data[DOMAIN][entry.entry_id][DATA_UNSUBSCRIBE].append(
+        await device_index.async_setup()
+    )
+    hass.data[DOMAIN][entry.entry_id][DATA_DEVICE_INDEX] = device_index
+
+    @callback
+    def async_update_node_device(node):
+        hass.async_create_task(handle_node_update(hass, node, device_index))
+
+    # repeated node changes only update the device registry when they matter
+    node_updates = ZWaveNodeUpdateScheduler(hass, async_update_node_device)
+    hass.data[DOMAIN][entry.entry_id][DATA_NODE_UPDATES] = node_updates
+    hass.data[DOMAIN][entry.entry_id][DATA_STATISTICS]["node_updates"] = node_updates
 
     for component in PLATFORMS:
         hass.async_create_task(
@@ -95,26 +249,28 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry):
         # Caution: This is also called on (re)start.
         _LOGGER.debug("[NODE ADDED] node_id: %s", node.id)
         data_nodes[node.id] = node
-        if node.id not in data_values:
-            data_values[node.id] = []
 
     @callback
     def async_node_changed(node):
         _LOGGER.debug("[NODE CHANGED] node_id: %s", node.id)
         data_nodes[node.id] = node
+        discovery_gate.async_node_changed(node)
         # notify devices about the node change
         if node.id not in removed_nodes:
-            hass.async_create_task(handle_node_update(hass, node))
+            node_updates.async_node_changed(node)
 
     @callback
     def async_node_removed(node):
         _LOGGER.debug("[NODE REMOVED] node_id: %s", node.id)
         data_nodes.pop(node.id)
+        node_updates.async_node_removed(node)
+        discovery_gate.async_node_removed(node)
+        data_value_index.pop(node.id, None)
         # node added/removed events also happen on (re)starts of hass/mqtt/ozw
         # cleanup device/entity registry if we know this node is permanently deleted
         # entities itself are removed by the values logic
         if node.id in removed_nodes:
-            hass.async_create_task(handle_remove_node(hass, node))
+            hass.async_create_task(handle_remove_node(hass, node, device_index))
             removed_nodes.remove(node.id)
 
     @callback
@@ -129,9 +285,12 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry):
 
     @callback
     def async_value_added(value):
-        node = value.node
         node_id = value.node.node_id
 
+        # Index the value and offer it to the entities that are waiting for it
+        value_index = data_value_index.setdefault(node_id, ZWaveNodeValueIndex())
+        value_index.add(value)
+
         # Filter out CommandClasses we're definitely not interested in.
         if value.command_class in [
             CommandClass.CONFIGURATION,
@@ -148,36 +307,38 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry):
             value.value_id_key,
             value.command_class,
         )
+        # values of nodes that are still being interviewed are discovered later on
+        discovery_gate.async_value_added(value)
 
-        node_data_values = data_values[node_id]
+    @callback
+    def async_discover_value(value):
+        node = value.node
+        node_id = node.node_id
+        value_index = data_value_index[node_id]
 
-        # Check if this value should be tracked by an existing entity
+        # Check if this value already has an entity
         value_unique_id = create_value_id(value)
-        for values in node_data_values:
-            values.check_value(value)
-            if values.values_id == value_unique_id:
-                return  # this value already has an entity
+        if data_values.has(node_id, value_unique_id):
+            return  # this value already has an entity
 
         # Run discovery on it and see if any entities need created
-        for schema in DISCOVERY_SCHEMAS:
-            if not check_node_schema(node, schema):
-                continue
-            if not check_value_schema(
-                value, schema[const.DISC_VALUES][const.DISC_PRIMARY]
-            ):
-                continue
-
-            values = ZWaveDeviceEntityValues(hass, options, schema, value)
+        for schema in get_matching_schemas(node, value):
+            values = ZWaveDeviceEntityValues(
+                hass, options, schema, value, value_index, entity_loader
+            )
             values.setup()
+            data_values.add(node_id, value_unique_id, values)
 
-            # We create a new list and update the reference here so that
-            # the list can be safely iterated over in the main thread
-            data_values[node_id] = node_data_values + [values]
+    @callback
+    def async_instance_status_changed(status):
+        # the daemon is done querying the nodes, so the replay is done as well
+        if status.status in const.INSTANCE_STATUS_ALL_NODES_QUERIED:
+            state_writer.async_end_replay()
+        # only the entities whose availability flips are written
+        availability.async_status_changed(status)
 
     @callback
     def async_value_changed(value):
-        # if an entity belonging to this value needs updating,
-        # it's handled within the entity logic
         _LOGGER.debug(
             "[VALUE CHANGED] node_id: %s - label: %s - value: %s - value_id: %s - CC: %s",
             value.node.id,
@@ -186,6 +347,11 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry):
             value.value_id_key,
             value.command_class,
         )
+        # confirm the command that was sent for this value, if any
+        latency_tracker.async_value_changed(value)
+        # if an entity belonging to this value needs updating,
+        # only the entities actually tracking this value are notified
+        value_dispatcher.async_dispatch(value)
         # Handle a scene activation message
         if value.command_class in [
             CommandClass.SCENE_ACTIVATION,
@@ -204,14 +370,31 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry):
             value.value_id_key,
             value.command_class,
         )
+        discovery_gate.async_value_removed(value)
         # signal all entities using this value for removal
         value_unique_id = create_value_id(value)
         async_dispatcher_send(hass, const.SIGNAL_DELETE_ENTITY, value_unique_id)
-        # remove value from our local list
-        node_data_values = data_values[value.node.id]
-        node_data_values[:] = [
-            item for item in node_data_values if item.values_id != value_unique_id
-        ]
+        # remove value from our local list and index
+        value_index = data_value_index.get(value.node.id)
+        removed = data_values.remove(value.node.id, value_unique_id)
+        if value_index is not None:
+            value_index.remove(value)
+            for item in removed:
+                value_index.discard(item)
+
+    # hold the discovery of nodes until their interview reached the query stage
+    discovery_gate = ZWaveDiscoveryGate(
+        hass,
+        async_discover_value,
+        stage=entry.options.get(
+            const.CONF_DISCOVERY_STAGE, const.DEFAULT_DISCOVERY_STAGE
+        ),
+        timeout=entry.options.get(
+            const.CONF_DISCOVERY_TIMEOUT, const.DEFAULT_DISCOVERY_TIMEOUT
+        ),
+    )
+    hass.data[DOMAIN][entry.entry_id][DATA_DISCOVERY_GATE] = discovery_gate
+    hass.data[DOMAIN][entry.entry_id][DATA_STATISTICS]["discovery"] = discovery_gate
 
     # Listen to events for node and value changes
     options.listen(EVENT_NODE_ADDED, async_node_added)
@@ -221,10 +404,41 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry):
     options.listen(EVENT_VALUE_CHANGED, async_value_changed)
     options.listen(EVENT_VALUE_REMOVED, async_value_removed)
     options.listen(EVENT_INSTANCE_EVENT, async_instance_event)
+    options.listen(EVENT_INSTANCE_STATUS_CHANGED, async_instance_status_changed)
 
-    # Register Services
-    services = ZWaveServices(hass, manager, data_nodes)
-    services.register()
+    # Start processing right away without waiting for the platforms to load,
+    # the entity loader buffers the entities until their platform is ready.
+    raw_payloads = entry.options.get(
+        const.CONF_RAW_PAYLOADS, const.DEFAULT_RAW_PAYLOADS
+    )
+    # Pre-create the entities from the snapshot of the previous run,
+    # identical messages received from MQTT later on are dropped as duplicates
+    if snapshot is not None:
+        for topic, payload in list(snapshot.topics.items()):
+            if raw_payloads:
+                # cache the payloads like the ones received from MQTT
+                payload = payload.encode()
+            payload_cache.is_duplicate(topic, payload)
+            ingestion_queue.async_put(topic, payload)
+        snapshot.async_start_reconcile()
+
+    # only subscribe to the topic families we actually consume
+    for topic in plan_subscriptions(
+        topic_prefix,
+        statistics=entry.options.get(
+            const.CONF_SUBSCRIBE_STATISTICS, const.DEFAULT_SUBSCRIBE_STATISTICS
+        ),
+        instances=entry.data.get(const.CONF_INSTANCES),
+    ):
+        hass.data[DOMAIN][entry.entry_id][DATA_UNSUBSCRIBE].append(
+            await mqtt.async_subscribe(
+                hass,
+                topic,
+                async_receive_message,
+                # raw payloads go to the JSON decoder as bytes
+                encoding=None if raw_payloads else "utf-8",
+            )
+        )
 
     return True
 
@@ -247,30 +461,44 @@ async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry):
     for unsubscribe_listener in hass.data[DOMAIN][entry.entry_id][DATA_UNSUBSCRIBE]:
         unsubscribe_listener()
     hass.data[DOMAIN][entry.entry_id][DATA_UNSUBSCRIBE].clear()
+    hass.data[DOMAIN][entry.entry_id][DATA_INGESTION_QUEUE].async_shutdown()
+    hass.data[DOMAIN][entry.entry_id][DATA_ENTITY_LOADER].async_shutdown()
+    hass.data[DOMAIN][entry.entry_id][DATA_NODE_UPDATES].async_shutdown()
+    hass.data[DOMAIN][entry.entry_id][DATA_DISCOVERY_GATE].async_shutdown()
+    hass.data[DOMAIN][entry.entry_id][DATA_COMMAND_COALESCER].async_shutdown()
+    hass.data[DOMAIN][entry.entry_id][DATA_COMMAND_SCHEDULER].async_shutdown()
+    if hass.data[DOMAIN][entry.entry_id][DATA_SNAPSHOT] is not None:
+        await hass.data[DOMAIN][entry.entry_id][DATA_SNAPSHOT].async_shutdown()
+    hass.data[DOMAIN][entry.entry_id][DATA_STATE_WRITER].async_shutdown()
     hass.data[DOMAIN].pop(entry.entry_id)
 
     return True
 
 
-async def handle_remove_node(hass: HomeAssistant, node: OZWNode):
+async def async_remove_entry(hass: HomeAssistant, entry: ConfigEntry):
+    """Remove the data stored for a config entry."""
+    await async_remove_snapshot(hass, entry.entry_id)
+
+
+async def async_update_options(hass: HomeAssistant, entry: ConfigEntry):
+    """Reload the config entry when its options are updated."""
+    await hass.config_entries.async_reload(entry.entry_id)
+
+
+async def handle_remove_node(
+    hass: HomeAssistant, node: OZWNode, device_index: ZWaveDeviceIndex
+):
     """Handle the removal of a Z-Wave node, removing all traces in device/entity registry."""
     dev_registry = await get_dev_reg(hass)
-    # grab device in device registry attached to this node
-    dev_id = create_device_id(node)
-    device = dev_registry.async_get_device({(DOMAIN, dev_id)}, set())
-    if device:
-        devices_to_remove = [device.id]
-        # also grab slave devices (node instances)
-        for item in dev_registry.devices.values():
-            if item.via_device_id == device.id:
-                devices_to_remove.append(item.id)
-        # remove all devices in registry related to this node
-        # note: removal of entity registry is handled by core
-        for dev_id in devices_to_remove:
-            dev_registry.async_remove_device(dev_id)
-
-
-async def handle_node_update(hass: HomeAssistant, node: OZWNode):
+    # grab the device attached to this node and its instance devices
+    # note: removal of entity registry is handled by core
+    for _, device in device_index.get_devices(create_device_id(node)):
+        dev_registry.async_remove_device(device.id)
+
+
+async def handle_node_update(
+    hass: HomeAssistant, node: OZWNode, device_index: ZWaveDeviceIndex
+):
     """
     Handle a node updated event from OZW.
 
@@ -278,21 +506,23 @@ async def handle_node_update(hass: HomeAssistant, node: OZWNode):
     We want these changes to be pushed to the device registry.
     """
     dev_registry = await get_dev_reg(hass)
-    # grab device in device registry attached to this node
-    dev_id = create_device_id(node)
-    device = dev_registry.async_get_device([(DOMAIN, dev_id)], [])
-    if not device:
-        return
-    # update device in device registry with (updated) info
-    for item in dev_registry.devices.values():
-        if item.id != device.id and item.via_device_id != device.id:
+    dev_name = create_device_name(node)
+    # update the device attached to this node and its instance devices
+    for instance, device in device_index.get_devices(create_device_id(node)):
+        name = dev_name if instance == 1 else f"{dev_name} - Instance {instance}"
+        if (
+            device.name == name
+            and device.manufacturer == node.node_manufacturer_name
+            and device.model == node.node_product_name
+        ):
             continue
-        dev_name = create_device_name(node)
-        dev_registry.async_update_device(
-            item.id,
+        # async_update_device can not update the manufacturer and model
+        dev_registry.async_get_or_create(
+            config_entry_id=next(iter(device.config_entries)),
+            identifiers=device.identifiers,
             manufacturer=node.node_manufacturer_name,
             model=node.node_product_name,
-            name=dev_name,
+            name=name,
         )
 
 
@@ -22,7 +22,7 @@ from homeassistant.core import callback
 from homeassistant.helpers.dispatcher import async_dispatcher_connect
 
 from .const import DATA_UNSUBSCRIBE, DOMAIN
-from .entity import ZWaveDeviceEntity
+from .entity import ZWaveDeviceEntity, create_entities
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -258,45 +258,15 @@ async def async_setup_entry(hass, config_entry, async_add_entities):
     """Set up Z-Wave binary_sensor from config entry."""
 
     @callback
-    def async_add_binary_sensor(values):
-        """Add Z-Wave Binary Sensor."""
-        sensors_to_add = []
-
-        if values.primary.type == ValueType.LIST:
-            # we convert Notification values into binary sensors
-            # https://github.com/OpenZWave/open-zwave/blob/master/config/NotificationCCTypes.xml
-            for list_value in values.primary.value["List"]:
-                # check if we have a mapping for this value
-                for item in NOTIFICATION_SENSORS:
-                    if item[NOTIFICATION_TYPE] != values.primary.index:
-                        continue
-                    if list_value["Value"] not in item[NOTIFICATION_VALUES]:
-                        continue
-                    sensors_to_add.append(
-                        ZWaveListValueSensor(
-                            # required values
-                            values,
-                            list_value["Value"],
-                            # optional values
-                            item.get(NOTIFICATION_DEVICE_CLASS),
-                            item.get(NOTIFICATION_SENSOR_ENABLED, True),
-                            item.get(NOTIFICATION_OFF_VALUE, NOTIFICATION_VALUE_CLEAR),
-                        )
-                    )
-
-        elif values.primary.type == ValueType.BOOL:
-            # classic/legacy binary sensor
-            sensors_to_add.append(ZWaveBinarySensor(values))
-        else:
-            # should not happen but just in case log it while we're in beta
-            _LOGGER.warning("Sensor not implemented for value %s", values.primary.label)
-            return
-
-        async_add_entities(sensors_to_add)
+    def async_add_binary_sensor(batch):
+        """Add a batch of Z-Wave Binary Sensors."""
+        async_add_entities(create_entities(batch, create_binary_sensors))
 
     hass.data[DOMAIN][config_entry.entry_id][DATA_UNSUBSCRIBE].append(
         async_dispatcher_connect(
-            hass, "zwave_new_binary_sensor", async_add_binary_sensor
+            hass,
+            f"zwave_new_binary_sensor_{config_entry.entry_id}",
+            async_add_binary_sensor,
         )
     )
 
@@ -305,6 +275,42 @@ async def async_setup_entry(hass, config_entry, async_add_entities):
     )
 
 
+def create_binary_sensors(values):
+    """Create the Z-Wave Binary Sensors for the discovered values."""
+    sensors_to_add = []
+
+    if values.primary.type == ValueType.LIST:
+        # we convert Notification values into binary sensors
+        # https://github.com/OpenZWave/open-zwave/blob/master/config/NotificationCCTypes.xml
+        for list_value in values.primary.value["List"]:
+            # check if we have a mapping for this value
+            for item in NOTIFICATION_SENSORS:
+                if item[NOTIFICATION_TYPE] != values.primary.index:
+                    continue
+                if list_value["Value"] not in item[NOTIFICATION_VALUES]:
+                    continue
+                sensors_to_add.append(
+                    ZWaveListValueSensor(
+                        # required values
+                        values,
+                        list_value["Value"],
+                        # optional values
+                        item.get(NOTIFICATION_DEVICE_CLASS),
+                        item.get(NOTIFICATION_SENSOR_ENABLED, True),
+                        item.get(NOTIFICATION_OFF_VALUE, NOTIFICATION_VALUE_CLEAR),
+                    )
+                )
+
+    elif values.primary.type == ValueType.BOOL:
+        # classic/legacy binary sensor
+        sensors_to_add.append(ZWaveBinarySensor(values))
+    else:
+        # should not happen but just in case log it while we're in beta
+        _LOGGER.warning("Sensor not implemented for value %s", values.primary.label)
+
+    return sensors_to_add
+
+
 class ZWaveBinarySensor(ZWaveDeviceEntity, BinarySensorDevice):
     """Representation of a Z-Wave binary_sensor."""
 
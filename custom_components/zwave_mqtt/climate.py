@@ -32,7 +32,7 @@ from homeassistant.core import callback
 from homeassistant.helpers.dispatcher import async_dispatcher_connect
 
 from .const import DATA_UNSUBSCRIBE, DOMAIN
-from .entity import ZWaveDeviceEntity
+from .entity import ZWaveDeviceEntity, create_entities
 
 VALUE_LIST = "List"
 VALUE_ID = "Value"
@@ -138,23 +138,27 @@ async def async_setup_entry(hass, config_entry, async_add_entities):
     """Set up Z-Wave Climate from Config Entry."""
 
     @callback
-    def async_add_climate(values):
-        """Add Z-Wave Climate."""
-        climate = None
-        if values.primary.command_class == CommandClass.THERMOSTAT_SETPOINT:
-            climate = ZWaveClimateSingleSetpoint(values)
-        elif values.primary.command_class == CommandClass.THERMOSTAT_MODE:
-            climate = ZWaveClimateMultipleSetpoint(values)
-
-        if climate is not None:
-            async_add_entities([climate])
+    def async_add_climate(batch):
+        """Add a batch of Z-Wave Climate devices."""
+        async_add_entities(create_entities(batch, create_climates))
 
     hass.data[DOMAIN][config_entry.entry_id][DATA_UNSUBSCRIBE].append(
-        async_dispatcher_connect(hass, "zwave_new_climate", async_add_climate)
+        async_dispatcher_connect(
+            hass, f"zwave_new_climate_{config_entry.entry_id}", async_add_climate
+        )
     )
     await hass.data[DOMAIN][config_entry.entry_id]["mark_platform_loaded"]("climate")
 
 
+def create_climates(values):
+    """Create the Z-Wave Climate devices for the discovered values."""
+    if values.primary.command_class == CommandClass.THERMOSTAT_SETPOINT:
+        return [ZWaveClimateSingleSetpoint(values)]
+    if values.primary.command_class == CommandClass.THERMOSTAT_MODE:
+        return [ZWaveClimateMultipleSetpoint(values)]
+    return []
+
+
 class ZWaveClimateBase(ZWaveDeviceEntity, ClimateDevice):
     """Representation of a Z-Wave Climate device."""
 
@@ -1,15 +1,53 @@
 """Config flow for zwave_mqtt integration."""
 import logging
 
+import voluptuous as vol
+
 from homeassistant import config_entries
+from homeassistant.core import callback
 
-from .const import DOMAIN  # pylint:disable=unused-import
+from .const import (  # pylint:disable=unused-import
+    CONF_COALESCE_STATE_WRITES,
+    CONF_COMMAND_RATE,
+    CONF_COMMAND_WINDOW,
+    CONF_DISCOVERY_STAGE,
+    CONF_DISCOVERY_TIMEOUT,
+    CONF_INSTANCES,
+    CONF_RAW_PAYLOADS,
+    CONF_STATE_WRITE_WINDOW,
+    CONF_SUBSCRIBE_STATISTICS,
+    CONF_SUPPRESS_REPLAY_WRITES,
+    CONF_TOPIC_PREFIX,
+    CONF_TOPIC_ROUTER,
+    CONF_WARM_START,
+    DEFAULT_COALESCE_STATE_WRITES,
+    DEFAULT_COMMAND_RATE,
+    DEFAULT_COMMAND_WINDOW,
+    DEFAULT_DISCOVERY_STAGE,
+    DEFAULT_DISCOVERY_TIMEOUT,
+    DEFAULT_RAW_PAYLOADS,
+    DEFAULT_STATE_WRITE_WINDOW,
+    DEFAULT_SUBSCRIBE_STATISTICS,
+    DEFAULT_SUPPRESS_REPLAY_WRITES,
+    DEFAULT_TOPIC_ROUTER,
+    DEFAULT_WARM_START,
+    DOMAIN,
+    NODE_QUERY_STAGES,
+    TOPIC_OPENZWAVE,
+)
 
 _LOGGER = logging.getLogger(__name__)
 
 TITLE = "Z-Wave MQTT"
 
 
+def parse_instances(instances):
+    """Parse a comma separated list of OZW instance ids, empty for all."""
+    return sorted(
+        {int(instance) for instance in instances.split(",") if instance.strip()}
+    )
+
+
 class DomainConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
     """Handle a config flow for zwave_mqtt."""
 
@@ -18,4 +56,131 @@ class DomainConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
 
     async def async_step_user(self, user_input=None):
         """Handle the initial step."""
-        return self.async_create_entry(title=TITLE, data={})
+        errors = {}
+        if user_input is not None:
+            topic_prefix = user_input[CONF_TOPIC_PREFIX].strip("/")
+            try:
+                instances = parse_instances(user_input[CONF_INSTANCES])
+            except ValueError:
+                errors[CONF_INSTANCES] = "invalid_instances"
+            else:
+                if self._async_is_configured(topic_prefix, instances):
+                    return self.async_abort(reason="already_configured")
+                title = TITLE
+                if instances:
+                    instance_ids = ", ".join(str(instance) for instance in instances)
+                    title = f"{TITLE} ({topic_prefix}, instances {instance_ids})"
+                elif topic_prefix != TOPIC_OPENZWAVE:
+                    title = f"{TITLE} ({topic_prefix})"
+                return self.async_create_entry(
+                    title=title,
+                    data={CONF_TOPIC_PREFIX: topic_prefix, CONF_INSTANCES: instances},
+                )
+
+        return self.async_show_form(
+            step_id="user",
+            data_schema=vol.Schema(
+                {
+                    vol.Optional(CONF_TOPIC_PREFIX, default=TOPIC_OPENZWAVE): str,
+                    vol.Optional(CONF_INSTANCES, default=""): str,
+                }
+            ),
+            errors=errors,
+        )
+
+    @callback
+    def _async_is_configured(self, topic_prefix, instances):
+        """Return if (some of) the instances are served by another entry."""
+        for entry in self._async_current_entries():
+            if entry.data.get(CONF_TOPIC_PREFIX, TOPIC_OPENZWAVE) != topic_prefix:
+                continue
+            configured = entry.data.get(CONF_INSTANCES)
+            if not configured or not instances or set(configured) & set(instances):
+                return True
+        return False
+
+    @staticmethod
+    @callback
+    def async_get_options_flow(config_entry):
+        """Get the options flow for this handler."""
+        return OptionsFlowHandler(config_entry)
+
+
+class OptionsFlowHandler(config_entries.OptionsFlow):
+    """Handle the options of zwave_mqtt."""
+
+    def __init__(self, config_entry):
+        """Initialize options flow."""
+        self.config_entry = config_entry
+
+    async def async_step_init(self, user_input=None):
+        """Manage the options."""
+        if user_input is not None:
+            return self.async_create_entry(title="", data=user_input)
+
+        options = self.config_entry.options
+        return self.async_show_form(
+            step_id="init",
+            data_schema=vol.Schema(
+                {
+                    vol.Optional(
+                        CONF_COALESCE_STATE_WRITES,
+                        default=options.get(
+                            CONF_COALESCE_STATE_WRITES, DEFAULT_COALESCE_STATE_WRITES
+                        ),
+                    ): bool,
+                    vol.Optional(
+                        CONF_STATE_WRITE_WINDOW,
+                        default=options.get(
+                            CONF_STATE_WRITE_WINDOW, DEFAULT_STATE_WRITE_WINDOW
+                        ),
+                    ): vol.All(vol.Coerce(float), vol.Range(min=0)),
+                    vol.Optional(
+                        CONF_SUPPRESS_REPLAY_WRITES,
+                        default=options.get(
+                            CONF_SUPPRESS_REPLAY_WRITES, DEFAULT_SUPPRESS_REPLAY_WRITES
+                        ),
+                    ): bool,
+                    vol.Optional(
+                        CONF_SUBSCRIBE_STATISTICS,
+                        default=options.get(
+                            CONF_SUBSCRIBE_STATISTICS, DEFAULT_SUBSCRIBE_STATISTICS
+                        ),
+                    ): bool,
+                    vol.Optional(
+                        CONF_WARM_START,
+                        default=options.get(CONF_WARM_START, DEFAULT_WARM_START),
+                    ): bool,
+                    vol.Optional(
+                        CONF_COMMAND_WINDOW,
+                        default=options.get(
+                            CONF_COMMAND_WINDOW, DEFAULT_COMMAND_WINDOW
+                        ),
+                    ): vol.All(vol.Coerce(float), vol.Range(min=0)),
+                    vol.Optional(
+                        CONF_COMMAND_RATE,
+                        default=options.get(CONF_COMMAND_RATE, DEFAULT_COMMAND_RATE),
+                    ): vol.All(vol.Coerce(float), vol.Range(min=0)),
+                    vol.Optional(
+                        CONF_RAW_PAYLOADS,
+                        default=options.get(CONF_RAW_PAYLOADS, DEFAULT_RAW_PAYLOADS),
+                    ): bool,
+                    vol.Optional(
+                        CONF_DISCOVERY_STAGE,
+                        default=options.get(
+                            CONF_DISCOVERY_STAGE, DEFAULT_DISCOVERY_STAGE
+                        ),
+                    ): vol.In(NODE_QUERY_STAGES),
+                    vol.Optional(
+                        CONF_DISCOVERY_TIMEOUT,
+                        default=options.get(
+                            CONF_DISCOVERY_TIMEOUT, DEFAULT_DISCOVERY_TIMEOUT
+                        ),
+                    ): vol.All(vol.Coerce(float), vol.Range(min=0)),
+                    vol.Optional(
+                        CONF_TOPIC_ROUTER,
+                        default=options.get(CONF_TOPIC_ROUTER, DEFAULT_TOPIC_ROUTER),
+                    ): bool,
+                }
+            ),
+        )
@@ -2,8 +2,82 @@
 
 DOMAIN = "zwave_mqtt"
 DATA_UNSUBSCRIBE = "unsubscribe"
+DATA_VALUE_DISPATCHER = "value_dispatcher"
+DATA_STATE_WRITER = "state_writer"
+DATA_STATISTICS = "statistics"
+DATA_INGESTION_QUEUE = "ingestion_queue"
+DATA_SNAPSHOT = "snapshot"
+DATA_ENTITY_LOADER = "entity_loader"
+DATA_COMMAND_COALESCER = "command_coalescer"
+DATA_COMMAND_SCHEDULER = "command_scheduler"
+DATA_MANAGER = "manager"
+DATA_NODES = "nodes"
+DATA_DEVICE_INDEX = "device_index"
+DATA_DISCOVERY_GATE = "discovery_gate"
+DATA_AVAILABILITY = "availability"
+DATA_NODE_UPDATES = "node_updates"
 PLATFORMS = ["binary_sensor", "cover", "climate", "fan", "sensor", "switch", "light"]
 
+# Config entry data
+CONF_TOPIC_PREFIX = "topic_prefix"
+CONF_INSTANCES = "instances"
+
+# Config entry options
+CONF_COALESCE_STATE_WRITES = "coalesce_state_writes"
+CONF_STATE_WRITE_WINDOW = "state_write_window"
+DEFAULT_COALESCE_STATE_WRITES = False
+DEFAULT_STATE_WRITE_WINDOW = 0
+CONF_SUBSCRIBE_STATISTICS = "subscribe_statistics"
+DEFAULT_SUBSCRIBE_STATISTICS = False
+CONF_WARM_START = "warm_start"
+DEFAULT_WARM_START = False
+CONF_COMMAND_WINDOW = "command_window"
+DEFAULT_COMMAND_WINDOW = 0
+CONF_COMMAND_RATE = "command_rate"
+DEFAULT_COMMAND_RATE = 0
+CONF_RAW_PAYLOADS = "raw_payloads"
+DEFAULT_RAW_PAYLOADS = False
+CONF_SUPPRESS_REPLAY_WRITES = "suppress_replay_writes"
+DEFAULT_SUPPRESS_REPLAY_WRITES = False
+CONF_DISCOVERY_STAGE = "discovery_stage"
+CONF_DISCOVERY_TIMEOUT = "discovery_timeout"
+DEFAULT_DISCOVERY_STAGE = "None"
+DEFAULT_DISCOVERY_TIMEOUT = 60
+CONF_TOPIC_ROUTER = "topic_router"
+DEFAULT_TOPIC_ROUTER = False
+
+# Statuses of the OZW instance once all nodes have been queried
+INSTANCE_STATUS_ALL_NODES_QUERIED = (
+    "driverAllNodesQueried",
+    "driverAllNodesQueriedSomeDead",
+)
+# Statuses of the OZW instance in which its entities are available
+INSTANCE_STATUS_AVAILABLE = INSTANCE_STATUS_ALL_NODES_QUERIED + (
+    "driverAwakeNodesQueried",
+)
+
+# Stages of the interview of a node by OZW, in order
+NODE_QUERY_STAGES = (
+    "None",
+    "ProtocolInfo",
+    "Probe",
+    "WakeUp",
+    "ManufacturerSpecific1",
+    "NodeInfo",
+    "NodePlusInfo",
+    "ManufacturerSpecific2",
+    "Versions",
+    "Instances",
+    "Static",
+    "CacheLoad",
+    "Associations",
+    "Neighbors",
+    "Session",
+    "Dynamic",
+    "Configuration",
+    "Complete",
+)
+
 # MQTT Topics
 TOPIC_OPENZWAVE = "OpenZWave"
 
@@ -18,6 +92,7 @@ ATTR_SCENE_ID = "scene_id"
 ATTR_SCENE_LABEL = "scene_label"
 ATTR_SCENE_VALUE_ID = "scene_value_id"
 ATTR_SCENE_VALUE_LABEL = "scene_value_label"
+ATTR_CONFIG_ENTRY_ID = "config_entry_id"
 
 # Service specific
 SERVICE_ADD_NODE = "add_node"
@@ -26,9 +101,11 @@ SERVICE_REMOVE_FAILED_NODE = "remove_failed_node"
 SERVICE_REPLACE_FAILED_NODE = "replace_failed_node"
 SERVICE_CANCEL_COMMAND = "cancel_command"
 SERVICE_SET_CONFIG_PARAMETER = "set_config_parameter"
+SERVICE_REPORT_STATISTICS = "report_statistics"
 
 # Home Assistant Events
 EVENT_SCENE_ACTIVATED = f"{DOMAIN}.scene_activated"
+EVENT_STATISTICS = f"{DOMAIN}.statistics"
 
 # Signals
 SIGNAL_DELETE_ENTITY = f"{DOMAIN}_delete_entity"
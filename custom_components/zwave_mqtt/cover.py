@@ -18,7 +18,7 @@ from homeassistant.core import callback
 from homeassistant.helpers.dispatcher import async_dispatcher_connect
 
 from .const import DATA_UNSUBSCRIBE, DOMAIN
-from .entity import ZWaveDeviceEntity
+from .entity import ZWaveDeviceEntity, create_entities
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -35,30 +35,34 @@ async def async_setup_entry(hass, config_entry, async_add_entities):
     """Set up Z-Wave Cover from Config Entry."""
 
     @callback
-    def async_add_cover(values):
-        """Add Z-Wave Cover."""
-        # Specific Cover Types
-        if values.primary.command_class != CommandClass.SWITCH_MULTILEVEL:
-            _LOGGER.warning("Cover not implemented for values %s", values.primary)
-            return
-
-        if (
-            values.primary.node.node_manufacturer_id == MANUFACTURER_ID_FIBARO
-            and values.primary.node.node_product_type == PRODUCT_TYPE_FIBARO_FGRM222
-        ):
-            cover = FibaroFGRM222Cover(values)
-        else:
-            cover = ZWaveCover(values)
-
-        async_add_entities([cover])
+    def async_add_cover(batch):
+        """Add a batch of Z-Wave Covers."""
+        async_add_entities(create_entities(batch, create_covers))
 
     hass.data[DOMAIN][config_entry.entry_id][DATA_UNSUBSCRIBE].append(
-        async_dispatcher_connect(hass, "zwave_new_cover", async_add_cover)
+        async_dispatcher_connect(
+            hass, f"zwave_new_cover_{config_entry.entry_id}", async_add_cover
+        )
     )
 
     await hass.data[DOMAIN][config_entry.entry_id]["mark_platform_loaded"]("cover")
 
 
+def create_covers(values):
+    """Create the Z-Wave Covers for the discovered values."""
+    # Specific Cover Types
+    if values.primary.command_class != CommandClass.SWITCH_MULTILEVEL:
+        _LOGGER.warning("Cover not implemented for values %s", values.primary)
+        return []
+
+    if (
+        values.primary.node.node_manufacturer_id == MANUFACTURER_ID_FIBARO
+        and values.primary.node.node_product_type == PRODUCT_TYPE_FIBARO_FGRM222
+    ):
+        return [FibaroFGRM222Cover(values)]
+    return [ZWaveCover(values)]
+
+
 class ZWaveCover(ZWaveDeviceEntity, CoverDevice):
     """Representation of a Z-Wave cover."""
 
@@ -0,0 +1,191 @@
+"""Index of the Z-Wave devices in the device registry."""
+from homeassistant.core import callback
+from homeassistant.helpers.device_registry import (
+    EVENT_DEVICE_REGISTRY_UPDATED,
+    async_get_registry as get_dev_reg,
+)
+
+from .const import DOMAIN
+
+
+class ZWaveDeviceIndex:
+    """Index the devices of a config entry by identifier and parent device.
+
+    The device registry only offers lookups by scanning all devices, while
+    node updates and removals need the device of a node and the devices of
+    its instances. The index is built with one scan on setup and kept up to
+    date with the device registry updated events.
+    """
+
+    def __init__(self, hass, entry_id):
+        """Initialize the (empty) index."""
+        self._hass = hass
+        self._entry_id = entry_id
+        self._registry = None
+        # create_device_id(node, instance) -> registry device id
+        self._device_ids = {}
+        # registry device id -> create_device_id(node, instance)
+        self._identifiers = {}
+        # registry device id of the node device -> registry device ids of its instances
+        self._children = {}
+        # registry device id of an instance device -> registry device id of the node
+        self._parents = {}
+
+    async def async_setup(self):
+        """Build the index and keep it updated, return a callback to stop."""
+        self._registry = await get_dev_reg(self._hass)
+        for device in list(self._registry.devices.values()):
+            self._async_index_device(device)
+        return self._hass.bus.async_listen(
+            EVENT_DEVICE_REGISTRY_UPDATED, self._async_registry_updated
+        )
+
+    @callback
+    def _async_registry_updated(self, event):
+        """Update the index for a created, updated or removed device."""
+        device_id = event.data["device_id"]
+        self._async_unindex_device(device_id)
+        if event.data["action"] == "remove":
+            # the instance devices of an updated device are kept
+            self._children.pop(device_id, None)
+            return
+        device = self._registry.async_get(device_id)
+        if device is not None:
+            self._async_index_device(device)
+
+    @callback
+    def _async_index_device(self, device):
+        """Add a device of the config entry to the index."""
+        if self._entry_id not in device.config_entries:
+            return
+        identifier = next(
+            (ident for domain, ident in device.identifiers if domain == DOMAIN), None
+        )
+        if identifier is None:
+            return
+        self._device_ids[identifier] = device.id
+        self._identifiers[device.id] = identifier
+        if device.via_device_id is not None:
+            self._parents[device.id] = device.via_device_id
+            self._children.setdefault(device.via_device_id, set()).add(device.id)
+
+    @callback
+    def _async_unindex_device(self, device_id):
+        """Remove a device from the index."""
+        identifier = self._identifiers.pop(device_id, None)
+        if identifier is not None and self._device_ids.get(identifier) == device_id:
+            del self._device_ids[identifier]
+        parent_id = self._parents.pop(device_id, None)
+        # the parent may have been removed before its instance devices
+        children = self._children.get(parent_id)
+        if children is not None:
+            children.discard(device_id)
+            if not children:
+                del self._children[parent_id]
+
+    def get_devices(self, dev_id):
+        """Return the (instance, device) of the node device and its instance devices.
+
+        `dev_id` -- Identifier of the node device, create_device_id(node).
+        """
+        parent_id = self._device_ids.get(dev_id)
+        if parent_id is None:
+            return []
+        devices = []
+        for device_id in [parent_id, *sorted(self._children.get(parent_id, ()))]:
+            device = self._registry.async_get(device_id)
+            if device is None:
+                continue
+            # the instance is the last part of the identifier
+            instance = int(self._identifiers[device_id].rsplit(".", 1)[1])
+            devices.append((instance, device))
+        return devices
+
+    def __len__(self):
+        """Return the number of indexed devices."""
+        return len(self._device_ids)
+
+
+def get_node_fingerprint(node):
+    """Return the fields of a node that end up in the device registry."""
+    return (
+        (node.meta_data or {}).get("Name"),
+        node.node_product_name,
+        node.node_manufacturer_name,
+    )
+
+
+class ZWaveNodeUpdateScheduler:
+    """Debounce the node changed events before updating the device registry.
+
+    OZW publishes a node many times during the interview. The changes of a node
+    in the same loop iteration are handled once, and the update only runs when
+    the fields used for the device registry differ from the last update.
+    """
+
+    def __init__(self, hass, update):
+        """Initialize the scheduler.
+
+        `update` -- Callback to update the device registry for a node.
+        """
+        self._hass = hass
+        self._update = update
+        # node_id -> fingerprint of the last update
+        self._fingerprints = {}
+        # node_id -> node changed since the last flush
+        self._pending = {}
+        self._flush_handle = None
+        self.received = 0
+        self.coalesced = 0
+        self.unchanged = 0
+        self.updates = 0
+
+    @callback
+    def async_node_changed(self, node):
+        """Schedule the update of the device registry for the node."""
+        self.received += 1
+        if node.id in self._pending:
+            self.coalesced += 1
+        self._pending[node.id] = node
+        if self._flush_handle is None:
+            self._flush_handle = self._hass.loop.call_soon(self._async_flush)
+
+    @callback
+    def _async_flush(self):
+        """Update the device registry for the changed nodes."""
+        self._flush_handle = None
+        pending = self._pending
+        self._pending = {}
+        for node_id, node in pending.items():
+            fingerprint = get_node_fingerprint(node)
+            if self._fingerprints.get(node_id) == fingerprint:
+                self.unchanged += 1
+                continue
+            self._fingerprints[node_id] = fingerprint
+            self.updates += 1
+            self._update(node)
+
+    @callback
+    def async_node_removed(self, node):
+        """Forget the node, an update is needed when it is added again."""
+        self._pending.pop(node.id, None)
+        self._fingerprints.pop(node.id, None)
+
+    @callback
+    def async_shutdown(self):
+        """Cancel the pending flush and drop all pending updates."""
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        self._pending.clear()
+
+    @property
+    def statistics(self):
+        """Return the statistics of the scheduler."""
+        return {
+            "received": self.received,
+            "coalesced": self.coalesced,
+            "unchanged": self.unchanged,
+            "suppressed": self.coalesced + self.unchanged,
+            "updates": self.updates,
+        }
@@ -1,6 +1,7 @@
 """Map Z-Wave nodes and values to Home Assistant entities."""
 
 import logging
+from types import MappingProxyType
 
 import openzwavemqtt.const as const_ozw
 from openzwavemqtt.const import CommandClass, ValueGenre, ValueIndex, ValueType
@@ -395,6 +396,147 @@ DISCOVERY_SCHEMAS = [
 ]
 
 
+class CompiledValueSchema:
+    """Value schema compiled to frozensets for fast matching."""
+
+    __slots__ = (
+        "command_classes",
+        "types",
+        "genres",
+        "indexes",
+        "instances",
+        "schemas",
+        "optional",
+    )
+
+    def __init__(self, schema):
+        """Compile the passed value schema."""
+        self.command_classes = compile_setting(schema, const.DISC_COMMAND_CLASS)
+        self.types = compile_setting(schema, const.DISC_TYPE)
+        self.genres = compile_setting(schema, const.DISC_GENRE)
+        self.indexes = compile_setting(schema, const.DISC_INDEX)
+        self.instances = compile_setting(schema, const.DISC_INSTANCE)
+        self.schemas = None
+        if const.DISC_SCHEMAS in schema:
+            self.schemas = tuple(
+                CompiledValueSchema(schema_item)
+                for schema_item in schema[const.DISC_SCHEMAS]
+            )
+        self.optional = schema.get(const.DISC_OPTIONAL, False)
+
+    def matches(self, value):
+        """Check if the value matches this value schema."""
+        if (
+            self.command_classes is not None
+            and value.parent.command_class_id not in self.command_classes
+        ):
+            return False
+        if self.types is not None and value.type not in self.types:
+            return False
+        if self.genres is not None and value.genre not in self.genres:
+            return False
+        if self.indexes is not None and value.index not in self.indexes:
+            return False
+        if self.instances is not None and value.instance not in self.instances:
+            return False
+        if self.schemas is not None and not any(
+            schema_item.matches(value) for schema_item in self.schemas
+        ):
+            return False
+        return True
+
+
+class CompiledSchema:
+    """Discovery schema compiled to frozensets for fast matching.
+
+    Compiled schemas are shared by all entities created from them and should
+    be treated as immutable.
+    """
+
+    __slots__ = (
+        "schema",
+        "component",
+        "node_ids",
+        "generic_device_classes",
+        "specific_device_classes",
+        "primary",
+        "values",
+    )
+
+    def __init__(self, schema):
+        """Compile the passed discovery schema."""
+        self.schema = schema
+        self.component = schema[const.DISC_COMPONENT]
+        self.node_ids = compile_setting(schema, const.DISC_NODE_ID)
+        self.generic_device_classes = compile_setting(
+            schema, const.DISC_GENERIC_DEVICE_CLASS
+        )
+        self.specific_device_classes = compile_setting(
+            schema, const.DISC_SPECIFIC_DEVICE_CLASS
+        )
+        self.values = MappingProxyType(
+            {
+                name: CompiledValueSchema(value_schema)
+                for name, value_schema in schema[const.DISC_VALUES].items()
+            }
+        )
+        self.primary = self.values[const.DISC_PRIMARY]
+
+    def matches_node(self, node):
+        """Check if the node matches this schema."""
+        if self.node_ids is not None and node.node_id not in self.node_ids:
+            return False
+        if (
+            self.generic_device_classes is not None
+            and node.node_generic not in self.generic_device_classes
+        ):
+            return False
+        if (
+            self.specific_device_classes is not None
+            and node.node_specific not in self.specific_device_classes
+        ):
+            return False
+        return True
+
+
+def compile_schemas(schemas):
+    """Compile the discovery schemas and bucket them by primary CommandClass.
+
+    Returns a tuple of the schemas per CommandClass and the schemas that apply
+    to all CommandClasses. The original order of the schemas is preserved.
+    """
+    compiled = [CompiledSchema(schema) for schema in schemas]
+    command_classes = set()
+    for schema in compiled:
+        command_classes.update(schema.primary.command_classes or ())
+
+    by_command_class = {
+        command_class: tuple(
+            schema
+            for schema in compiled
+            if schema.primary.command_classes is None
+            or command_class in schema.primary.command_classes
+        )
+        for command_class in command_classes
+    }
+    any_command_class = tuple(
+        schema for schema in compiled if schema.primary.command_classes is None
+    )
+    return by_command_class, any_command_class
+
+
+def get_matching_schemas(node, value):
+    """Return the compiled schemas for which the value is a primary value."""
+    candidates = COMPILED_SCHEMAS.get(
+        value.parent.command_class_id, COMPILED_SCHEMAS_ANY_COMMAND_CLASS
+    )
+    return [
+        schema
+        for schema in candidates
+        if schema.matches_node(node) and schema.primary.matches(value)
+    ]
+
+
 def check_node_schema(node, schema):
     """Check if node matches the passed node schema."""
     if const.DISC_NODE_ID in schema and node.node_id not in schema[const.DISC_NODE_ID]:
@@ -452,3 +594,39 @@ def ensure_list(value):
     if isinstance(value, list):
         return value
     return [value]
+
+
+def compile_setting(schema, key):
+    """Convert a schema setting to a frozenset, None if it is not present."""
+    if key not in schema:
+        return None
+    return frozenset(ensure_list(schema[key]))
+
+
+COMPILED_SCHEMAS, COMPILED_SCHEMAS_ANY_COMMAND_CLASS = compile_schemas(
+    DISCOVERY_SCHEMAS
+)
+
+
+def get_command_classes(compiled_schemas):
+    """Return all CommandClasses referenced by the (compiled) schemas."""
+    command_classes = set()
+    value_schemas = [
+        value_schema
+        for schema in compiled_schemas
+        for value_schema in schema.values.values()
+    ]
+    while value_schemas:
+        value_schema = value_schemas.pop()
+        command_classes.update(value_schema.command_classes or ())
+        value_schemas.extend(value_schema.schemas or ())
+    return frozenset(command_classes)
+
+
+DISCOVERY_COMMAND_CLASSES = get_command_classes(
+    {
+        schema
+        for schemas in COMPILED_SCHEMAS.values()
+        for schema in schemas + COMPILED_SCHEMAS_ANY_COMMAND_CLASS
+    }
+)
@@ -1,69 +1,272 @@
 """Generic Z-Wave Entity Classes."""
 
-import copy
+from datetime import timedelta
 import logging
+from operator import attrgetter
 
-from openzwavemqtt.const import EVENT_INSTANCE_STATUS_CHANGED, EVENT_VALUE_CHANGED
 from openzwavemqtt.models.node import OZWNode
 from openzwavemqtt.models.value import OZWValue
 
+from homeassistant.const import STATE_UNAVAILABLE
 from homeassistant.core import callback
 from homeassistant.helpers.dispatcher import (
     async_dispatcher_connect,
     async_dispatcher_send,
 )
 from homeassistant.helpers.entity import Entity
+from homeassistant.helpers.event import async_call_later
+import homeassistant.util.dt as dt_util
 
 from . import const
-from .const import DOMAIN, PLATFORMS
-from .discovery import check_node_schema, check_value_schema
+from .const import DOMAIN, PLATFORMS, TOPIC_OPENZWAVE
 
 _LOGGER = logging.getLogger(__name__)
 
+# Seconds without state write requests after which the startup replay is done
+REPLAY_QUIET_PERIOD = 5
+
+
+class ZWaveNodeValueIndex:
+    """Index of the values of a single node by CommandClass, instance and index."""
+
+    def __init__(self):
+        """Initialize the (empty) index."""
+        # (command_class, instance) -> {index: [values]}
+        self._values = {}
+        # (command_class, instance) -> [ZWaveDeviceEntityValues]
+        self._waiting = {}
+
+    @callback
+    def add(self, value):
+        """Add a value to the index and offer it to the values waiting for it."""
+        key = (value.command_class, value.instance)
+        self._values.setdefault(key, {}).setdefault(value.index, []).append(value)
+
+        for values in self._waiting.get(key, ()):
+            values.check_value(value)
+        for values in self._waiting.get((None, value.instance), ()):
+            values.check_value(value)
+
+    @callback
+    def remove(self, value):
+        """Remove a value from the index."""
+        indexes = self._values.get((value.command_class, value.instance), {})
+        items = indexes.get(value.index, [])
+        if value in items:
+            items.remove(value)
+        if not items:
+            indexes.pop(value.index, None)
+
+    def lookup(self, value_schema, instance):
+        """Return the values matching the CommandClass(es) and index(es) of the schema."""
+        if value_schema.command_classes is None:
+            for (_, value_instance), indexes in list(self._values.items()):
+                if value_instance != instance:
+                    continue
+                for items in list(indexes.values()):
+                    yield from list(items)
+            return
+
+        for command_class in value_schema.command_classes:
+            indexes = self._values.get((command_class, instance))
+            if not indexes:
+                continue
+            if value_schema.indexes is None:
+                for items in list(indexes.values()):
+                    yield from list(items)
+                continue
+            for index in value_schema.indexes:
+                yield from list(indexes.get(index, ()))
+
+    @callback
+    def wait(self, values, command_class, instance):
+        """Offer values for this CommandClass and instance to the values object.
+
+        A command_class of None offers the values of all CommandClasses.
+        """
+        # We create a new list and update the reference here so that
+        # the list can be safely iterated over while a value is added
+        key = (command_class, instance)
+        self._waiting[key] = self._waiting.get(key, []) + [values]
+
+    @callback
+    def discard(self, values):
+        """Stop offering values to the values object."""
+        for key, waiting in list(self._waiting.items()):
+            if values in waiting:
+                self._waiting[key] = [item for item in waiting if item is not values]
+
+
+class ZWaveValuesRegistry:
+    """The values objects of the nodes by node id and values id.
+
+    Multiple schemas can match the same primary value, so a values id maps to
+    a tuple of values objects.
+    """
+
+    def __init__(self):
+        """Initialize the (empty) registry."""
+        # node_id -> {values_id: (ZWaveDeviceEntityValues, ...)}
+        self._nodes = {}
+
+    @callback
+    def add(self, node_id, values_id, values):
+        """Add a values object of the node."""
+        node_values = self._nodes.setdefault(node_id, {})
+        node_values[values_id] = node_values.get(values_id, ()) + (values,)
+
+    def has(self, node_id, values_id):
+        """Return if the node has values objects for the values id."""
+        return values_id in self._nodes.get(node_id, {})
+
+    @callback
+    def remove(self, node_id, values_id):
+        """Remove and return the values objects of the node for the values id."""
+        node_values = self._nodes.get(node_id)
+        if node_values is None:
+            return ()
+        removed = node_values.pop(values_id, ())
+        if not node_values:
+            del self._nodes[node_id]
+        return removed
+
+    def snapshot(self, node_id=None):
+        """Return a list of the values objects (of a node) that is safe to iterate."""
+        if node_id is not None:
+            nodes = [self._nodes.get(node_id, {})]
+        else:
+            nodes = list(self._nodes.values())
+        return [
+            values
+            for node_values in nodes
+            for items in list(node_values.values())
+            for values in items
+        ]
+
+    def __len__(self):
+        """Return the number of values objects."""
+        return sum(
+            len(items)
+            for node_values in self._nodes.values()
+            for items in node_values.values()
+        )
+
+
+# Schema -> values class with a slot for every value of the schema
+_VALUES_CLASSES = {}
+
+
+def _tuple_getter(names):
+    """Return a function returning the tuple of the named attributes of an object."""
+    if len(names) == 1:
+        # attrgetter returns the attribute itself for a single name
+        getter = attrgetter(names[0])
+        # a plain function would be bound as a method of the values class
+        return staticmethod(lambda obj: (getter(obj),))
+    return attrgetter(*names)
+
+
+def get_values_class(schema):
+    """Return the values class with slots for the values of the (compiled) schema."""
+    values_class = _VALUES_CLASSES.get(schema)
+    if values_class is None:
+        names = tuple(schema.values)
+        for name in names:
+            if hasattr(ZWaveDeviceEntityValues, name) or name.startswith("_"):
+                raise ValueError(f"Value name {name} is reserved")
+        values_class = type(
+            "ZWaveDeviceEntityValues",
+            (ZWaveDeviceEntityValues,),
+            {
+                "__slots__": names,
+                "_value_names": names,
+                "_get_values": _tuple_getter(names),
+            },
+        )
+        _VALUES_CLASSES[schema] = values_class
+    return values_class
+
 
 class ZWaveDeviceEntityValues:
-    """Manages entity access to the underlying Z-Wave value objects."""
+    """Manages entity access to the underlying Z-Wave value objects.
+
+    Instances are created from a class generated per schema, which stores the
+    values in slots named after the values of the schema. This makes
+    `values.primary` a plain attribute lookup.
+    """
 
-    def __init__(self, hass, options, schema, primary_value):
-        """Initialize the values object with the passed entity schema."""
+    __slots__ = (
+        "_hass",
+        "_entity_created",
+        "_schema",
+        "_value_index",
+        "_loader",
+        "_node",
+        "_node_id",
+        "_instance",
+        "options",
+    )
+
+    _value_names = ()
+
+    def __new__(cls, hass, options, schema, *args):
+        """Create the values object from the values class of the schema."""
+        if cls is ZWaveDeviceEntityValues:
+            return super().__new__(get_values_class(schema))
+        return super().__new__(cls)
+
+    def __init__(self, hass, options, schema, primary_value, value_index, loader):
+        """Initialize the values object with the passed (compiled) entity schema.
+
+        The schema is shared between all values objects and never modified,
+        the node and instance of the primary value are bound per values object.
+        """
         self._hass = hass
         self._entity_created = False
-        self._schema = copy.deepcopy(schema)
-        self._values = {}
+        self._schema = schema
+        for name in self._value_names:
+            setattr(self, name, None)
+        self._value_index = value_index
+        self._loader = loader
         self.options = options
 
-        # Go through values listed in the discovery schema, initialize them,
-        # and add a check to the schema to make sure the Instance matches.
-        for name, disc_settings in self._schema[const.DISC_VALUES].items():
-            self._values[name] = None
-            disc_settings[const.DISC_INSTANCE] = [primary_value.instance]
-
-        self._values[const.DISC_PRIMARY] = primary_value
+        self.primary = primary_value
         self._node = primary_value.node
-        self._schema[const.DISC_NODE_ID] = [self._node.node_id]
+        self._node_id = self._node.node_id
+        self._instance = primary_value.instance
 
     def setup(self):
         """Set up values instance."""
         # Check values that have already been discovered for node
         # and see if they match the schema and need added to the entity.
-        for value in self._node.values():
-            self.check_value(value)
+        for name, value_schema in self._schema.values.items():
+            if getattr(self, name) is not None:
+                continue
+            for value in self._value_index.lookup(value_schema, self._instance):
+                self.check_value(value)
+
+            # Get offered the value(s) if they are discovered later on
+            if getattr(self, name) is None:
+                for command_class in value_schema.command_classes or (None,):
+                    self._value_index.wait(self, command_class, self._instance)
 
         # Check if all the _required_ values in the schema are present and
         # create the entity.
         self._check_entity_ready()
 
     def __getattr__(self, name):
-        """Get the specified value for this entity."""
-        return self._values.get(name, None)
+        """Get None for values that are not in the schema of this entity."""
+        if name.startswith("__"):
+            raise AttributeError(name)
+        return None
 
     def __iter__(self):
         """Allow iteration over all values."""
-        return iter(self._values.values())
+        return iter(self._get_values(self))
 
     def __contains__(self, name):
         """Check if the specified name/key exists in the values."""
-        return name in self._values
+        return name in self._schema.values
 
     @callback
     def check_value(self, value):
@@ -71,21 +274,25 @@ class ZWaveDeviceEntityValues:
 
         If a match is found, it is added to the values mapping.
         """
-        # Make sure the node matches the schema for this entity.
-        if not check_node_schema(value.node, self._schema):
+        # Make sure the node and instance match the ones bound to this entity.
+        if value.instance != self._instance:
+            return
+        if value.node.node_id != self._node_id:
+            return
+        if not self._schema.matches_node(value.node):
             return
 
         # Go through the possible values for this entity defined by the schema.
-        for name in self._values:
+        for name, value_schema in self._schema.values.items():
             # Skip if it's already been added.
-            if self._values[name] is not None:
+            if getattr(self, name) is not None:
                 continue
             # Skip if the value doesn't match the schema.
-            if not check_value_schema(value, self._schema[const.DISC_VALUES][name]):
+            if not value_schema.matches(value):
                 continue
 
             # Add value to mapping.
-            self._values[name] = value
+            setattr(self, name, value)
 
             # If the entity has already been created, notify it of the new value.
             if self._entity_created:
@@ -102,14 +309,12 @@ class ZWaveDeviceEntityValues:
             return
 
         # Go through values defined in the schema and abort if a required value is missing.
-        for name, disc_settings in self._schema[const.DISC_VALUES].items():
-            if self._values[name] is None and not disc_settings.get(
-                const.DISC_OPTIONAL
-            ):
+        for name, value_schema in self._schema.values.items():
+            if getattr(self, name) is None and not value_schema.optional:
                 return
 
         # We have all the required values, so create the entity.
-        component = self._schema[const.DISC_COMPONENT]
+        component = self._schema.component
 
         _LOGGER.debug(
             "Adding Node_id=%s Generic_command_class=%s, "
@@ -128,7 +333,7 @@ class ZWaveDeviceEntityValues:
         self._entity_created = True
 
         if component in PLATFORMS:
-            async_dispatcher_send(self._hass, f"zwave_new_{component}", self)
+            self._loader.async_add(component, self)
 
     @property
     def values_id(self):
@@ -136,6 +341,465 @@ class ZWaveDeviceEntityValues:
         return create_value_id(self.primary)
 
 
+class ZWaveValueDispatcher:
+    """Route value changes to the listeners tracking that specific value."""
+
+    def __init__(self):
+        """Initialize the (empty) dispatch index."""
+        self._listeners = {}
+
+    @callback
+    def async_listen(self, value_id_key, listener):
+        """Listen for changes of the value with the given ValueIDKey."""
+        # We create a new tuple and update the reference here so that
+        # the listeners can be safely iterated over while dispatching
+        self._listeners[value_id_key] = self._listeners.get(value_id_key, ()) + (
+            listener,
+        )
+
+        @callback
+        def remove_listener():
+            """Remove the listener again."""
+            listeners = tuple(
+                item
+                for item in self._listeners.get(value_id_key, ())
+                if item is not listener
+            )
+            if listeners:
+                self._listeners[value_id_key] = listeners
+            else:
+                self._listeners.pop(value_id_key, None)
+
+        return remove_listener
+
+    @callback
+    def async_dispatch(self, value):
+        """Notify the listeners of a changed value."""
+        for listener in self._listeners.get(value.value_id_key, ()):
+            listener(value)
+
+    def __len__(self):
+        """Return the number of values being listened to."""
+        return len(self._listeners)
+
+
+def create_entities(batch, create):
+    """Create the entities for a batch of discovered values.
+
+    `create` -- Callback returning the list of entities for a values object.
+    A values object that fails is logged and skipped, without dropping the
+    entities of the other values in the batch.
+    """
+    entities = []
+    for values in batch:
+        try:
+            entities.extend(create(values))
+        except Exception:  # pylint: disable=broad-except
+            _LOGGER.exception("Error creating the entities for %s", values.primary)
+    return entities
+
+
+class ZWaveEntityLoader:
+    """Hand discovered values to their platform in batches.
+
+    Values discovered in the same loop iteration are sent as one batch on the
+    zwave_new_<platform>_<entry_id> signal, so every platform adds them with a
+    single async_add_entities call. Values discovered before their platform is loaded
+    are buffered until the platform has connected to its signal.
+    """
+
+    def __init__(self, hass, entry_id):
+        """Initialize the loader, no platforms are loaded yet."""
+        self._hass = hass
+        self._entry_id = entry_id
+        self._loaded = set()
+        self._pending = {}
+        self._flush_handle = None
+        self.batches = 0
+        self.added = 0
+
+    @callback
+    def async_add(self, component, values):
+        """Add the entity for the discovered values to its platform."""
+        self._pending.setdefault(component, []).append(values)
+        if component not in self._loaded or self._flush_handle is not None:
+            return
+        self._flush_handle = self._hass.loop.call_soon(self._async_flush)
+
+    @callback
+    def async_platform_loaded(self, component):
+        """Mark the platform as loaded and add its buffered entities."""
+        self._loaded.add(component)
+        self._async_send(component)
+
+    @callback
+    def _async_flush(self):
+        """Send the pending batches of all loaded platforms."""
+        self._flush_handle = None
+        for component in self._loaded:
+            self._async_send(component)
+
+    @callback
+    def _async_send(self, component):
+        """Send the pending batch of the platform."""
+        batch = self._pending.pop(component, None)
+        if not batch:
+            return
+        self.batches += 1
+        self.added += len(batch)
+        async_dispatcher_send(
+            self._hass, f"zwave_new_{component}_{self._entry_id}", batch
+        )
+
+    @callback
+    def async_shutdown(self):
+        """Cancel the pending flush and drop all pending values."""
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        self._pending.clear()
+
+    @property
+    def statistics(self):
+        """Return the statistics of the loader."""
+        return {
+            "loaded_platforms": len(self._loaded),
+            "pending": sum(len(pending) for pending in self._pending.values()),
+            "batches": self.batches,
+            "added": self.added,
+        }
+
+
+class ZWaveDiscoveryGate:
+    """Hold the discovery of the values of a node until its interview is far enough.
+
+    During the interview the values of a node trickle in, and a value that
+    arrives later can change the features of an entity that already exists.
+    The values of a node that has not reached the query stage yet are held
+    and discovered together once the node reaches the stage, or the timeout
+    has passed. The first query stage ("None") disables holding values.
+    """
+
+    def __init__(self, hass, discover, stage=const.NODE_QUERY_STAGES[0], timeout=0):
+        """Initialize the gate.
+
+        `discover` -- Callback to run the discovery for a value.
+        `stage` -- Query stage from which on the values of a node are discovered.
+        `timeout` -- Seconds after which held values are discovered regardless.
+        """
+        self._hass = hass
+        self._discover = discover
+        self._stage = const.NODE_QUERY_STAGES.index(stage)
+        self._timeout = timeout
+        # node_id -> values held for discovery
+        self._held = {}
+        self._timers = {}
+        self.released_by_stage = 0
+        self.released_by_timeout = 0
+
+    def _is_ready(self, node):
+        """Return if the interview of the node reached the query stage."""
+        stage = node.node_query_stage
+        if stage not in const.NODE_QUERY_STAGES:
+            # nothing to wait for when the stage is unknown
+            return True
+        return const.NODE_QUERY_STAGES.index(stage) >= self._stage
+
+    @callback
+    def async_value_added(self, value):
+        """Discover the value, or hold it when the node is not ready yet."""
+        node_id = value.node.node_id
+        if node_id not in self._held and self._is_ready(value.node):
+            self._discover(value)
+            return
+        if node_id not in self._held:
+            self._held[node_id] = []
+            if self._timeout:
+                self._timers[node_id] = self._hass.loop.call_later(
+                    self._timeout, self._async_timeout, node_id
+                )
+        self._held[node_id].append(value)
+
+    @callback
+    def async_node_changed(self, node):
+        """Discover the held values when the node reached the query stage."""
+        if node.node_id in self._held and self._is_ready(node):
+            self.released_by_stage += 1
+            self._async_release(node.node_id)
+
+    @callback
+    def _async_timeout(self, node_id):
+        """Discover the held values of a node that takes too long."""
+        self._timers.pop(node_id, None)
+        _LOGGER.debug("Interview of node %s not done in time, discovering it", node_id)
+        self.released_by_timeout += 1
+        self._async_release(node_id)
+
+    @callback
+    def _async_release(self, node_id):
+        """Discover the held values of the node."""
+        timer = self._timers.pop(node_id, None)
+        if timer is not None:
+            timer.cancel()
+        for value in self._held.pop(node_id, ()):
+            self._discover(value)
+
+    @callback
+    def async_value_removed(self, value):
+        """Stop holding a removed value."""
+        held = self._held.get(value.node.node_id)
+        if held is not None and value in held:
+            held.remove(value)
+
+    @callback
+    def async_node_removed(self, node):
+        """Drop the held values of a removed node."""
+        timer = self._timers.pop(node.node_id, None)
+        if timer is not None:
+            timer.cancel()
+        self._held.pop(node.node_id, None)
+
+    @callback
+    def async_shutdown(self):
+        """Stop all timeouts and drop all held values."""
+        for timer in self._timers.values():
+            timer.cancel()
+        self._timers.clear()
+        self._held.clear()
+
+    @property
+    def statistics(self):
+        """Return the statistics of the gate."""
+        return {
+            "held_nodes": len(self._held),
+            "held_values": sum(len(held) for held in self._held.values()),
+            "released_by_stage": self.released_by_stage,
+            "released_by_timeout": self.released_by_timeout,
+        }
+
+
+class ZWaveStateWriteScheduler:
+    """Schedule the state writes of the Z-Wave entities.
+
+    When coalescing is enabled, entities are marked dirty and written once
+    when the window has passed (or in the next loop iteration for a window of 0).
+
+    During the replay of the retained topics on startup the entities are only
+    updated in memory. Each entity that changed is written once when the replay
+    is done: the daemon reports all nodes queried or the updates are quiet for
+    a while.
+    """
+
+    def __init__(
+        self,
+        hass,
+        coalesce=False,
+        window=0,
+        replay=False,
+        quiet_period=REPLAY_QUIET_PERIOD,
+    ):
+        """Initialize the scheduler."""
+        self._hass = hass
+        self._coalesce = coalesce
+        self._window = window
+        # entity_id -> entity, entities are not hashable
+        self._dirty = {}
+        self._flush_handle = None
+        self._unsub_flush = None
+        self._replaying = replay
+        self._quiet_period = quiet_period
+        self._last_replay_request = None
+        self._unsub_replay = None
+        self.requested = 0
+        self.written = 0
+        self.unchanged = 0
+        self.replay_requested = 0
+
+    @callback
+    def async_schedule_write(self, entity):
+        """Schedule a state write for the entity."""
+        self.requested += 1
+        if self._replaying:
+            # written when the replay is done
+            self.replay_requested += 1
+            self._last_replay_request = dt_util.utcnow()
+            self._dirty[entity.entity_id] = entity
+            if self._unsub_replay is None:
+                # the quiet period starts with the first write of the replay
+                self._unsub_replay = async_call_later(
+                    self._hass, self._quiet_period, self._async_check_replay
+                )
+            return
+
+        if not self._coalesce:
+            self._async_write(entity)
+            return
+
+        self._dirty[entity.entity_id] = entity
+        if self._flush_handle is not None or self._unsub_flush is not None:
+            return
+        if self._window:
+            self._unsub_flush = async_call_later(
+                self._hass, self._window, self._async_flush_window
+            )
+        else:
+            self._flush_handle = self._hass.loop.call_soon(self._async_flush)
+
+    @callback
+    def async_cancel(self, entity):
+        """Cancel a pending state write for the entity."""
+        self._dirty.pop(entity.entity_id, None)
+
+    @callback
+    def _async_check_replay(self, now):
+        """End the replay when no state writes were requested for a while."""
+        self._unsub_replay = None
+        remaining = (
+            self._last_replay_request + timedelta(seconds=self._quiet_period) - now
+        ).total_seconds()
+        if remaining > 0:
+            self._unsub_replay = async_call_later(
+                self._hass, remaining, self._async_check_replay
+            )
+            return
+        _LOGGER.debug("State writes quiet for %ss, replay done", self._quiet_period)
+        self.async_end_replay()
+
+    @callback
+    def async_end_replay(self):
+        """Write the state of the entities that changed during the replay."""
+        if not self._replaying:
+            return
+        self._replaying = False
+        if self._unsub_replay is not None:
+            self._unsub_replay()
+            self._unsub_replay = None
+        self._async_flush()
+
+    @callback
+    def _async_flush_window(self, _now):
+        """Write the state of all dirty entities when the window has passed."""
+        self._unsub_flush = None
+        self._async_flush()
+
+    @callback
+    def _async_flush(self):
+        """Write the state of all dirty entities."""
+        self._flush_handle = None
+        dirty = self._dirty
+        self._dirty = {}
+        for entity in dirty.values():
+            self._async_write(entity)
+
+    @callback
+    def _async_write(self, entity):
+        """Write the state of the entity, skip it if nothing changed."""
+        if entity.async_write_ha_state_if_changed():
+            self.written += 1
+        else:
+            self.unchanged += 1
+
+    @callback
+    def async_shutdown(self):
+        """Cancel the pending flush and drop all dirty entities."""
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        if self._unsub_flush is not None:
+            self._unsub_flush()
+            self._unsub_flush = None
+        if self._unsub_replay is not None:
+            self._unsub_replay()
+            self._unsub_replay = None
+        self._dirty.clear()
+
+    @property
+    def statistics(self):
+        """Return the statistics of the scheduler."""
+        return {
+            "requested": self.requested,
+            "written": self.written,
+            "unchanged": self.unchanged,
+            "saved": self.requested - self.written - len(self._dirty),
+            "pending": len(self._dirty),
+            "replaying": self._replaying,
+            "replay_requested": self.replay_requested,
+        }
+
+
+class ZWaveInstanceAvailability:
+    """Availability of the entities derived from the status of their OZW instance.
+
+    The availability is computed once per status change of an instance, and
+    only the entities of an instance whose availability flips are notified.
+    """
+
+    def __init__(self):
+        """Initialize the (empty) availability cache."""
+        # instance_id -> available
+        self._available = {}
+        # instance_id -> entity_id -> entity, entities are not hashable
+        self._entities = {}
+        self.flips = 0
+
+    @staticmethod
+    def _status_available(status):
+        """Return if the entities are available in the instance status."""
+        return status.status in const.INSTANCE_STATUS_AVAILABLE
+
+    def is_available(self, ozw_instance):
+        """Return if the entities of the OZW instance are available."""
+        available = self._available.get(ozw_instance.id)
+        if available is None:
+            status = ozw_instance.get_status()
+            if not status or status.status is None:
+                # no status received yet, not cached until it is received
+                return False
+            available = self._status_available(status)
+            self._available[ozw_instance.id] = available
+        return available
+
+    @callback
+    def async_status_changed(self, status):
+        """Update the availability and notify the entities if it flipped."""
+        if status.status is None:
+            return
+        instance_id = status.parent.id
+        available = self._status_available(status)
+        previous = self._available.get(instance_id)
+        if previous == available:
+            return
+        self._available[instance_id] = available
+        if previous is not None:
+            self.flips += 1
+        for entity in list(self._entities.get(instance_id, {}).values()):
+            entity.async_availability_changed()
+
+    @callback
+    def async_add_entity(self, instance_id, entity):
+        """Notify the entity when the availability of the instance flips."""
+        self._entities.setdefault(instance_id, {})[entity.entity_id] = entity
+
+    @callback
+    def async_remove_entity(self, instance_id, entity):
+        """Stop notifying the entity."""
+        entities = self._entities.get(instance_id)
+        if entities is not None:
+            entities.pop(entity.entity_id, None)
+
+    @property
+    def statistics(self):
+        """Return the statistics of the availability cache."""
+        return {
+            "available": sorted(
+                instance_id
+                for instance_id, available in self._available.items()
+                if available
+            ),
+            "flips": self.flips,
+        }
+
+
 class ZWaveDeviceEntity(Entity):
     """Generic Entity Class for a Z-Wave Device."""
 
@@ -143,6 +807,11 @@ class ZWaveDeviceEntity(Entity):
         """Initilize a generic Z-Wave device entity."""
         self.values = values
         self.options = values.options
+        self._value_dispatcher = None
+        self._value_listeners = {}
+        self._state_writer = None
+        self._availability = None
+        self._last_rendered_state = None
 
     @callback
     def on_value_update(self):
@@ -154,9 +823,13 @@ class ZWaveDeviceEntity(Entity):
 
     async def async_added_to_hass(self):
         """Call when entity is added."""
-        # add dispatcher and OZW listeners callbacks,
-        self.options.listen(EVENT_VALUE_CHANGED, self._value_changed)
-        self.options.listen(EVENT_INSTANCE_STATUS_CHANGED, self._instance_updated)
+        entry_data = self.hass.data[DOMAIN][self.platform.config_entry.entry_id]
+        self._value_dispatcher = entry_data[const.DATA_VALUE_DISPATCHER]
+        self._state_writer = entry_data[const.DATA_STATE_WRITER]
+        self._availability = entry_data[const.DATA_AVAILABILITY]
+        # add dispatcher and availability callbacks,
+        self._async_listen_values()
+        self._availability.async_add_entity(self._ozw_instance_id, self)
         # add to on_remove so they will be cleaned up on entity removal
         self.async_on_remove(
             async_dispatcher_connect(
@@ -168,6 +841,46 @@ class ZWaveDeviceEntity(Entity):
                 self.hass, f"{self.values.values_id}_value_added", self._value_added
             )
         )
+        # the initial state is written by Home Assistant when the entity is added
+        self._last_rendered_state = self._async_render_state()
+
+    @callback
+    def async_write_ha_state(self):
+        """Write the state to the state machine.
+
+        Only async_write_ha_state_if_changed renders the state for the
+        comparison, a direct write forgets the last rendered state instead of
+        rendering it twice.
+        """
+        self._last_rendered_state = None
+        super().async_write_ha_state()
+
+    @callback
+    def async_write_ha_state_if_changed(self):
+        """Write the state to the state machine if it changed since the last write.
+
+        Returns if the state was written.
+        """
+        rendered_state = self._async_render_state()
+        if rendered_state == self._last_rendered_state:
+            return False
+        self._last_rendered_state = rendered_state
+        super().async_write_ha_state()
+        return True
+
+    @callback
+    def _async_render_state(self):
+        """Render the parts of the entity that end up in the state machine."""
+        if not self.available:
+            return STATE_UNAVAILABLE
+        return (
+            self.state,
+            self.state_attributes,
+            self.device_state_attributes,
+            self.unit_of_measurement,
+            self.supported_features,
+            self.name,
+        )
 
     @property
     def device_info(self):
@@ -204,16 +917,21 @@ class ZWaveDeviceEntity(Entity):
         """Return the unique_id of the entity."""
         return self.values.values_id
 
+    @property
+    def should_poll(self):
+        """No polling needed, the state is pushed by the OZW daemon."""
+        return False
+
     @property
     def available(self) -> bool:
         """Return entity availability."""
         # Use OZW Daemon status for availability.
-        instance_status = self.values.primary.ozw_instance.get_status()
-        return instance_status and instance_status.status in [
-            "driverAllNodesQueriedSomeDead",
-            "driverAllNodesQueried",
-            "driverAwakeNodesQueried",
-        ]
+        return self._availability.is_available(self.values.primary.ozw_instance)
+
+    @property
+    def _ozw_instance_id(self):
+        """Return the id of the OZW instance of the entity."""
+        return self.values.primary.ozw_instance.id
 
     @callback
     def _value_changed(self, value):
@@ -222,9 +940,8 @@ class ZWaveDeviceEntity(Entity):
 
         Should not be overriden by subclasses.
         """
-        if value.value_id_key in (v.value_id_key for v in self.values if v):
-            self.on_value_update()
-            self.async_write_ha_state()
+        self.on_value_update()
+        self._state_writer.async_schedule_write(self)
 
     @callback
     def _value_added(self):
@@ -233,17 +950,29 @@ class ZWaveDeviceEntity(Entity):
 
         Should not be overriden by subclasses.
         """
+        self._async_listen_values()
         self.on_value_update()
 
     @callback
-    def _instance_updated(self, new_status):
+    def _async_listen_values(self):
+        """Listen for changes of all values in the ZWaveDeviceEntityValues."""
+        for value in self.values:
+            if value is None or value.value_id_key in self._value_listeners:
+                continue
+            remove_listener = self._value_dispatcher.async_listen(
+                value.value_id_key, self._value_changed
+            )
+            self._value_listeners[value.value_id_key] = remove_listener
+
+    @callback
+    def async_availability_changed(self):
         """
-        Call when the instance status changes.
+        Call when the availability of the instance flips.
 
         Should not be overriden by subclasses.
         """
         self.on_value_update()
-        self.async_write_ha_state()
+        self._state_writer.async_schedule_write(self)
 
     async def _delete_callback(self, values_id):
         """Remove this entity."""
@@ -255,10 +984,11 @@ class ZWaveDeviceEntity(Entity):
     async def async_will_remove_from_hass(self) -> None:
         """Call when entity will be removed from hass."""
         # cleanup OZW listeners
-        self.options.listeners[EVENT_VALUE_CHANGED].remove(self._value_changed)
-        self.options.listeners[EVENT_INSTANCE_STATUS_CHANGED].remove(
-            self._instance_updated
-        )
+        for remove_listener in self._value_listeners.values():
+            remove_listener()
+        self._value_listeners.clear()
+        self._state_writer.async_cancel(self)
+        self._availability.async_remove_entity(self._ozw_instance_id, self)
 
 
 def create_device_name(node: OZWNode):
@@ -278,10 +1008,19 @@ def create_device_id(node: OZWNode, node_instance: int = 1):
     """Generate unique device_id from a OZWNode."""
     ozw_instance = node.parent.id
     dev_id = f"{ozw_instance}.{node.node_id}.{node_instance}"
+    topic_prefix = node.options.topic_prefix
+    if topic_prefix != f"{TOPIC_OPENZWAVE}/":
+        # [TOPIC_PREFIX].[OZW_INSTANCE_ID].[NODE_ID].[NODE_INSTANCE]
+        dev_id = f"{topic_prefix.rstrip('/')}.{dev_id}"
     return dev_id
 
 
 def create_value_id(value: OZWValue):
     """Generate unique value_id from an OZWValue."""
     # [OZW_INSTANCE_ID]-[NODE_ID]-[VALUE_ID_KEY]
-    return f"{value.node.parent.id}-{value.node.id}-{value.value_id_key}"
+    value_id = f"{value.node.parent.id}-{value.node.id}-{value.value_id_key}"
+    topic_prefix = value.options.topic_prefix
+    if topic_prefix != f"{TOPIC_OPENZWAVE}/":
+        # other daemons can use the same instance ids, so prefix with the topic prefix
+        value_id = f"{topic_prefix.rstrip('/')}-{value_id}"
+    return value_id
@@ -13,7 +13,7 @@ from homeassistant.core import callback
 from homeassistant.helpers.dispatcher import async_dispatcher_connect
 
 from .const import DATA_UNSUBSCRIBE, DOMAIN
-from .entity import ZWaveDeviceEntity
+from .entity import ZWaveDeviceEntity, create_entities
 
 SPEED_LIST = [SPEED_OFF, SPEED_LOW, SPEED_MEDIUM, SPEED_HIGH]
 
@@ -29,13 +29,14 @@ async def async_setup_entry(hass, config_entry, async_add_entities):
     """Set up Z-Wave Fan from Config Entry."""
 
     @callback
-    def async_add_fan(values):
-        """Add Z-Wave Fan."""
-        fan = ZwaveFan(values)
-        async_add_entities([fan])
+    def async_add_fan(batch):
+        """Add a batch of Z-Wave Fans."""
+        async_add_entities(create_entities(batch, lambda values: [ZwaveFan(values)]))
 
     hass.data[DOMAIN][config_entry.entry_id][DATA_UNSUBSCRIBE].append(
-        async_dispatcher_connect(hass, "zwave_new_fan", async_add_fan)
+        async_dispatcher_connect(
+            hass, f"zwave_new_fan_{config_entry.entry_id}", async_add_fan
+        )
     )
 
     await hass.data[DOMAIN][config_entry.entry_id]["mark_platform_loaded"]("fan")
@@ -0,0 +1,168 @@
+"""Queue and process incoming MQTT messages in time-budgeted batches."""
+import asyncio
+from collections import OrderedDict, deque
+import logging
+from time import monotonic
+
+from homeassistant.core import callback
+
+_LOGGER = logging.getLogger(__name__)
+
+# Maximum time (seconds) a single batch may block the event loop
+DEFAULT_TIME_BUDGET = 0.02
+
+# Maximum number of topics to remember the last payload of
+DEFAULT_PAYLOAD_CACHE_SIZE = 20000
+
+
+class ZWaveIngestionQueue:
+    """Queue incoming MQTT messages and hand them to the manager in batches.
+
+    Between batches control is given back to the event loop, so a flood of
+    (retained) messages does not block Home Assistant.
+    """
+
+    def __init__(self, hass, process_message, time_budget=DEFAULT_TIME_BUDGET):
+        """Initialize the queue."""
+        self._hass = hass
+        self._process_message = process_message
+        self._time_budget = time_budget
+        self._queue = deque()
+        self._drain_task = None
+        self.received = 0
+        self.processed = 0
+        self.batches = 0
+        self.max_depth = 0
+        self.max_batch_duration = 0.0
+        self.processing_time = 0.0
+
+    @callback
+    def async_put(self, topic, payload):
+        """Queue a message and make sure the queue gets drained."""
+        self._queue.append((topic, payload))
+        self.received += 1
+        if len(self._queue) > self.max_depth:
+            self.max_depth = len(self._queue)
+
+        if self._drain_task is None:
+            self._drain_task = self._hass.async_create_task(self._async_drain())
+
+    async def _async_drain(self):
+        """Process queued messages in batches until the queue is empty."""
+        try:
+            while self._queue:
+                self._process_batch()
+                # yield to the event loop between batches
+                await asyncio.sleep(0)
+        finally:
+            self._drain_task = None
+
+    def _process_batch(self):
+        """Process messages until the queue is empty or the time budget is used."""
+        start = monotonic()
+        deadline = start + self._time_budget
+        queue = self._queue
+        while queue:
+            topic, payload = queue.popleft()
+            try:
+                self._process_message(topic, payload)
+            except Exception:  # pylint: disable=broad-except
+                _LOGGER.exception("Error processing message on topic %s", topic)
+            self.processed += 1
+            if monotonic() >= deadline:
+                break
+
+        duration = monotonic() - start
+        self.batches += 1
+        self.processing_time += duration
+        if duration > self.max_batch_duration:
+            self.max_batch_duration = duration
+
+    @callback
+    def async_shutdown(self):
+        """Stop processing and drop all queued messages."""
+        self._queue.clear()
+        if self._drain_task is not None:
+            self._drain_task.cancel()
+            self._drain_task = None
+
+    @property
+    def statistics(self):
+        """Return the statistics of the queue."""
+        drain_rate = 0.0
+        if self.processing_time:
+            drain_rate = self.processed / self.processing_time
+        return {
+            "queue_depth": len(self._queue),
+            "max_queue_depth": self.max_depth,
+            "received": self.received,
+            "processed": self.processed,
+            "batches": self.batches,
+            "drain_rate": round(drain_rate, 1),
+            "max_batch_duration": round(self.max_batch_duration, 4),
+        }
+
+
+class ZWavePayloadCache:
+    """Remember the last payload per topic to drop repeats.
+
+    When MQTT reconnects (or the daemon republishes) all retained topics are
+    delivered again, while most of them did not change.
+    """
+
+    def __init__(self, max_size=DEFAULT_PAYLOAD_CACHE_SIZE, event_markers=()):
+        """Initialize the cache."""
+        self._max_size = max_size
+        self._event_markers = event_markers
+        self._payloads = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @callback
+    def is_duplicate(self, topic, payload):
+        """Return if the payload is identical to the last payload of the topic."""
+        if any(marker in topic for marker in self._event_markers):
+            return False
+
+        payloads = self._payloads
+        if payloads.get(topic) == payload:
+            payloads.move_to_end(topic)
+            self.hits += 1
+            return True
+
+        self.misses += 1
+        payloads[topic] = payload
+        payloads.move_to_end(topic)
+        if len(payloads) > self._max_size:
+            payloads.popitem(last=False)
+            self.evictions += 1
+        return False
+
+    @callback
+    def invalidate(self, topic):
+        """Forget the payload of a topic (with or without trailing slash)."""
+        topic = topic.rstrip("/")
+        self._payloads.pop(topic, None)
+        self._payloads.pop(f"{topic}/", None)
+
+    @callback
+    def invalidate_prefix(self, topic_prefix):
+        """Forget the payloads of a topic and all topics below it."""
+        topic_prefix = topic_prefix.rstrip("/")
+        self.invalidate(topic_prefix)
+        topic_prefix = f"{topic_prefix}/"
+        for topic in [
+            topic for topic in self._payloads if topic.startswith(topic_prefix)
+        ]:
+            del self._payloads[topic]
+
+    @property
+    def statistics(self):
+        """Return the statistics of the cache."""
+        return {
+            "size": len(self._payloads),
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
@@ -12,7 +12,7 @@ from homeassistant.core import callback
 from homeassistant.helpers.dispatcher import async_dispatcher_connect
 
 from .const import DATA_UNSUBSCRIBE, DOMAIN
-from .entity import ZWaveDeviceEntity
+from .entity import ZWaveDeviceEntity, create_entities
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -21,13 +21,14 @@ async def async_setup_entry(hass, config_entry, async_add_entities):
     """Set up Z-Wave Light from Config Entry."""
 
     @callback
-    def async_add_light(values):
-        """Add Z-Wave Light."""
-        light = ZwaveDimmer(values)
-        async_add_entities([light])
+    def async_add_light(batch):
+        """Add a batch of Z-Wave Lights."""
+        async_add_entities(create_entities(batch, lambda values: [ZwaveDimmer(values)]))
 
     hass.data[DOMAIN][config_entry.entry_id][DATA_UNSUBSCRIBE].append(
-        async_dispatcher_connect(hass, "zwave_new_light", async_add_light)
+        async_dispatcher_connect(
+            hass, f"zwave_new_light_{config_entry.entry_id}", async_add_light
+        )
     )
 
     await hass.data[DOMAIN][config_entry.entry_id]["mark_platform_loaded"]("light")
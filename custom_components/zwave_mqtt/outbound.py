@@ -0,0 +1,343 @@
+"""Coalesce, schedule and track the outbound commands published to MQTT."""
+from collections import OrderedDict, deque
+import logging
+from time import monotonic
+
+from openzwavemqtt.const import CommandClass
+
+from homeassistant.core import callback
+
+_LOGGER = logging.getLogger(__name__)
+
+COMMAND_SET_VALUE = "command/setvalue/"
+
+# Priority lanes of the scheduler, lower is sent first
+PRIORITY_USER = 0
+PRIORITY_SERVICE = 1
+PRIORITIES = (PRIORITY_USER, PRIORITY_SERVICE)
+PRIORITY_NAMES = {PRIORITY_USER: "user", PRIORITY_SERVICE: "service"}
+
+# Seconds after which a command without confirmation is counted as timed out
+LATENCY_TIMEOUT = 10
+# Upper bounds (seconds) of the round-trip latency histogram buckets
+LATENCY_BUCKETS = (0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+
+def decode_value_id_key(value_id_key):
+    """Return the node id and CommandClass id encoded in an OZW ValueIDKey."""
+    value_id = value_id_key & 0xFFFFFFFF
+    return value_id >> 24, (value_id >> 14) & 0xFF
+
+
+def get_command_target(topic, payload):
+    """Return the priority and node id (None for the controller) of a command.
+
+    Values are set from the entities (user lane), except for the configuration
+    parameters. All other commands are service/controller traffic.
+    """
+    if not isinstance(payload, dict):
+        return PRIORITY_SERVICE, None
+    if topic.endswith(COMMAND_SET_VALUE) and "ValueIDKey" in payload:
+        node_id, command_class = decode_value_id_key(payload["ValueIDKey"])
+        if command_class == CommandClass.CONFIGURATION:
+            return PRIORITY_SERVICE, node_id
+        return PRIORITY_USER, node_id
+    return PRIORITY_SERVICE, payload.get("node")
+
+
+class ZWaveCommandCoalescer:
+    """Keep only the latest pending target per value.
+
+    The first command for a value is sent right away and opens a window.
+    Commands for the same value within that window replace each other and
+    only the last one is sent when the window has passed, so dragging a slider
+    results in a few frames instead of one per step. A window of 0 disables
+    coalescing.
+    """
+
+    def __init__(self, hass, publish, window=0):
+        """Initialize the coalescer.
+
+        `publish` -- Callback to publish a (topic, payload) to MQTT.
+        `window` -- Seconds in which repeated commands for a value are coalesced.
+        """
+        self._hass = hass
+        self._publish = publish
+        self._window = window
+        # (topic, ValueIDKey) -> pending payload or None if nothing is pending
+        self._windows = {}
+        self._timers = {}
+        self.requested = 0
+        self.sent = 0
+        self.coalesced = 0
+
+    @callback
+    def async_send(self, topic, payload):
+        """Send the command, coalescing it with the pending one of the value."""
+        self.requested += 1
+        if (
+            not self._window
+            or not topic.endswith(COMMAND_SET_VALUE)
+            or not isinstance(payload, dict)
+        ):
+            self._async_publish(topic, payload)
+            return
+
+        key = (topic, payload.get("ValueIDKey"))
+        if key not in self._windows:
+            self._async_publish(topic, payload)
+            self._async_open_window(key)
+            return
+
+        if self._windows[key] is not None:
+            self.coalesced += 1
+            _LOGGER.debug("Coalesced command %s on topic %s", self._windows[key], topic)
+        self._windows[key] = payload
+
+    @callback
+    def _async_open_window(self, key):
+        """Hold back the commands for the value until the window has passed."""
+        self._windows[key] = None
+        self._timers[key] = self._hass.loop.call_later(
+            self._window, self._async_close_window, key
+        )
+
+    @callback
+    def _async_close_window(self, key):
+        """Send the latest pending command of the value, if any."""
+        self._timers.pop(key, None)
+        payload = self._windows.pop(key)
+        if payload is None:
+            return
+        self._async_publish(key[0], payload)
+        self._async_open_window(key)
+
+    @callback
+    def _async_publish(self, topic, payload):
+        """Publish the command."""
+        self.sent += 1
+        self._publish(topic, payload)
+
+    @callback
+    def async_shutdown(self):
+        """Send the pending commands and stop all windows."""
+        for timer in self._timers.values():
+            timer.cancel()
+        self._timers.clear()
+        windows = self._windows
+        self._windows = {}
+        for (topic, _), payload in windows.items():
+            if payload is not None:
+                self._async_publish(topic, payload)
+
+    @property
+    def statistics(self):
+        """Return the statistics of the coalescer."""
+        return {
+            "requested": self.requested,
+            "sent": self.sent,
+            "frames_avoided": self.coalesced,
+            "pending": sum(
+                1 for payload in self._windows.values() if payload is not None
+            ),
+        }
+
+
+class ZWaveCommandScheduler:
+    """Publish the outbound commands with a global rate limit.
+
+    Commands are queued per node in a priority lane, user commands are sent
+    before configuration/service traffic. Within a lane the nodes take turns,
+    so a scene touching many nodes does not starve a single command to
+    another node. A rate of 0 disables the scheduler.
+    """
+
+    def __init__(self, hass, publish, rate=0):
+        """Initialize the scheduler.
+
+        `publish` -- Callback to publish a (topic, payload) to MQTT.
+        `rate` -- Maximum number of commands published per second.
+        """
+        self._hass = hass
+        self._publish = publish
+        self._interval = 1 / rate if rate else 0
+        # priority -> node_id -> deque of (queued at, topic, payload)
+        self._lanes = {priority: OrderedDict() for priority in PRIORITIES}
+        self._next_send = 0.0
+        self._timer = None
+        self.sent = dict.fromkeys(PRIORITIES, 0)
+        self.total_wait = dict.fromkeys(PRIORITIES, 0.0)
+        self.max_wait = dict.fromkeys(PRIORITIES, 0.0)
+
+    @callback
+    def async_send(self, topic, payload):
+        """Queue the command in the lane and node queue it belongs to."""
+        priority, node_id = get_command_target(topic, payload)
+        queued = monotonic()
+        if not self._interval:
+            self._async_publish(priority, queued, topic, payload)
+            return
+
+        lane = self._lanes[priority]
+        if node_id not in lane:
+            lane[node_id] = deque()
+        lane[node_id].append((queued, topic, payload))
+        self._async_schedule()
+
+    @callback
+    def _async_schedule(self):
+        """Schedule sending the next command when the rate limit allows it."""
+        if self._timer is not None:
+            return
+        delay = max(0, self._next_send - monotonic())
+        self._timer = self._hass.loop.call_later(delay, self._async_send_next)
+
+    @callback
+    def _async_send_next(self):
+        """Send the next command of the highest priority lane."""
+        self._timer = None
+        for priority, lane in self._lanes.items():
+            if lane:
+                break
+        else:
+            return
+
+        node_id, node_queue = next(iter(lane.items()))
+        queued, topic, payload = node_queue.popleft()
+        # the node goes to the back of the lane to give the other nodes a turn
+        if node_queue:
+            lane.move_to_end(node_id)
+        else:
+            del lane[node_id]
+
+        self._async_publish(priority, queued, topic, payload)
+        self._next_send = monotonic() + self._interval
+        if any(self._lanes.values()):
+            self._async_schedule()
+
+    @callback
+    def _async_publish(self, priority, queued, topic, payload):
+        """Publish the command and record its time in the queue."""
+        wait = monotonic() - queued
+        self.sent[priority] += 1
+        self.total_wait[priority] += wait
+        if wait > self.max_wait[priority]:
+            self.max_wait[priority] = wait
+        self._publish(topic, payload)
+
+    @callback
+    def async_shutdown(self):
+        """Stop the rate limit and send all queued commands."""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        for priority, lane in self._lanes.items():
+            while lane:
+                _, node_queue = lane.popitem(last=False)
+                for queued, topic, payload in node_queue:
+                    self._async_publish(priority, queued, topic, payload)
+
+    @property
+    def statistics(self):
+        """Return the statistics of the scheduler."""
+        statistics = {}
+        for priority, name in PRIORITY_NAMES.items():
+            sent = self.sent[priority]
+            statistics[name] = {
+                "queue_depth": sum(
+                    len(node_queue) for node_queue in self._lanes[priority].values()
+                ),
+                "sent": sent,
+                "avg_wait": round(self.total_wait[priority] / sent, 4) if sent else 0.0,
+                "max_wait": round(self.max_wait[priority], 4),
+            }
+        return statistics
+
+
+class ZWaveCommandLatencyTracker:
+    """Track the round-trip latency of the setvalue commands per node.
+
+    Published commands are timestamped in a pending table keyed by ValueIDKey
+    and matched with the next value changed event of that value, commands that
+    are not confirmed within the timeout are counted as timed out.
+    """
+
+    def __init__(self, timeout=LATENCY_TIMEOUT):
+        """Initialize the (empty) tracker."""
+        self._timeout = timeout
+        # ValueIDKey -> (sent at, node_id)
+        self._pending = {}
+        # node_id -> latency statistics of the node
+        self._nodes = {}
+
+    @callback
+    def async_command_sent(self, topic, payload):
+        """Register a published command as pending confirmation."""
+        if not topic.endswith(COMMAND_SET_VALUE) or not isinstance(payload, dict):
+            return
+        value_id_key = payload.get("ValueIDKey")
+        if value_id_key is None:
+            return
+        self._async_expire()
+        node_id, _ = decode_value_id_key(value_id_key)
+        self._pending[value_id_key] = (monotonic(), node_id)
+
+    @callback
+    def async_value_changed(self, value):
+        """Match a changed value with its pending command."""
+        pending = self._pending.pop(value.value_id_key, None)
+        if pending is None:
+            return
+        sent, node_id = pending
+        latency = monotonic() - sent
+        node = self._get_node(node_id)
+        if latency > self._timeout:
+            node["timeouts"] += 1
+            return
+        node["count"] += 1
+        node["total"] += latency
+        node["max"] = max(node["max"], latency)
+        bucket = next(
+            (bucket for bucket in LATENCY_BUCKETS if latency <= bucket),
+            LATENCY_BUCKETS[-1],
+        )
+        node["histogram"][bucket] += 1
+
+    @callback
+    def _async_expire(self):
+        """Count the pending commands that were not confirmed in time."""
+        expired = monotonic() - self._timeout
+        for value_id_key, (sent, node_id) in list(self._pending.items()):
+            if sent < expired:
+                del self._pending[value_id_key]
+                self._get_node(node_id)["timeouts"] += 1
+
+    def _get_node(self, node_id):
+        """Return the latency statistics of the node."""
+        if node_id not in self._nodes:
+            self._nodes[node_id] = {
+                "count": 0,
+                "total": 0.0,
+                "max": 0.0,
+                "timeouts": 0,
+                "histogram": dict.fromkeys(LATENCY_BUCKETS, 0),
+            }
+        return self._nodes[node_id]
+
+    @property
+    def statistics(self):
+        """Return the latency statistics per node."""
+        self._async_expire()
+        statistics = {}
+        for node_id, node in sorted(self._nodes.items()):
+            count = node["count"]
+            statistics[node_id] = {
+                "confirmed": count,
+                "timeouts": node["timeouts"],
+                "avg": round(node["total"] / count, 4) if count else 0.0,
+                "max": round(node["max"], 4),
+                "histogram": {
+                    f"<={bucket}": hits for bucket, hits in node["histogram"].items()
+                },
+            }
+        return {"pending": len(self._pending), "nodes": statistics}
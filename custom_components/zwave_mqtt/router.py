@@ -0,0 +1,122 @@
+"""Route incoming MQTT messages to the manager by their topic family."""
+from collections import deque
+import json
+import logging
+
+from openzwavemqtt.const import EMPTY_PAYLOAD
+
+from homeassistant.core import callback
+
+from .topics import compile_topic_trie, match_topic_family
+
+_LOGGER = logging.getLogger(__name__)
+
+# Maximum number of topics to remember the resolved route of
+DEFAULT_ROUTE_CACHE_SIZE = 20000
+
+# Family of the topics that are not consumed
+FAMILY_IGNORED = "ignored"
+
+# Use a faster JSON decoder when one is installed, all of them accept str and bytes
+try:
+    from orjson import loads as fast_json_loads
+
+    JSON_DECODER = "orjson"
+except ImportError:
+    try:
+        from ujson import loads as fast_json_loads
+
+        JSON_DECODER = "ujson"
+    except ImportError:
+        fast_json_loads = None
+        JSON_DECODER = "json"
+
+
+def decode_payload(payload):
+    """Decode a (str or bytes) JSON payload, an empty payload removes an item."""
+    if not payload:
+        return EMPTY_PAYLOAD
+    if fast_json_loads is not None:
+        try:
+            return fast_json_loads(payload)
+        except ValueError:
+            # the json module also accepts NaN/Infinity and lone surrogates
+            _LOGGER.debug("Falling back to the json module for %s", payload[:80])
+    if isinstance(payload, bytes):
+        # faster than letting the json module detect the encoding
+        payload = payload.decode("utf-8")
+    return json.loads(payload)
+
+
+class ZWaveTopicRouter:
+    """Resolve topics once and hand the pre-split topic to the manager.
+
+    The topic family is looked up in a prefix trie and the route (handler
+    and topic segments) is cached per topic string, so repeated
+    messages on a topic skip the splitting and matching. Topics of families
+    the integration does not consume are dropped before the payload is decoded.
+    """
+
+    def __init__(self, manager, topic_prefix, max_size=DEFAULT_ROUTE_CACHE_SIZE):
+        """Initialize the router for the manager serving the topic prefix."""
+        self._manager = manager
+        self._topic_prefix = topic_prefix
+        self._max_size = max_size
+        self._trie = compile_topic_trie()
+        # topic -> (handler, segments)
+        self._routes = {}
+        # family -> number of topics resolved to it
+        self.families = {}
+        self.misses = 0
+        self.ignored = 0
+
+    @callback
+    def async_route(self, topic, payload):
+        """Route the message to the handler of its topic family."""
+        route = self._routes.get(topic)
+        if route is None:
+            route = self._resolve(topic)
+            if len(self._routes) >= self._max_size:
+                # drop the oldest route, dicts keep their insertion order
+                del self._routes[next(iter(self._routes))]
+            self._routes[topic] = route
+            self.misses += 1
+
+        handler, segments = route
+        handler(segments, payload)
+
+    def _resolve(self, topic):
+        """Resolve the route (handler and topic segments) of a topic."""
+        segments = ()
+        family = None
+        if topic.startswith(self._topic_prefix):
+            segments = topic[len(self._topic_prefix) :].split("/")
+            if segments[-1] == "":
+                segments.pop()
+            segments = tuple(segments)
+            family = match_topic_family(self._trie, segments)
+
+        family = family or FAMILY_IGNORED
+        self.families[family] = self.families.get(family, 0) + 1
+        if family == FAMILY_IGNORED:
+            return self._ignore, segments
+        return self._process, segments
+
+    def _process(self, segments, payload):
+        """Decode the payload and hand it to the manager."""
+        self._manager.process_message(deque(segments), decode_payload(payload))
+
+    def _ignore(self, segments, payload):
+        """Drop a message of a topic family that is not consumed."""
+        self.ignored += 1
+
+    @property
+    def statistics(self):
+        """Return the statistics of the router."""
+        return {
+            "routes": len(self._routes),
+            "misses": self.misses,
+            "ignored": self.ignored,
+            "decoder": JSON_DECODER,
+            "families": dict(self.families),
+        }
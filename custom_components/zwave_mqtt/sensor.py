@@ -17,7 +17,7 @@ from homeassistant.core import callback
 from homeassistant.helpers.dispatcher import async_dispatcher_connect
 
 from .const import DATA_UNSUBSCRIBE, DOMAIN
-from .entity import ZWaveDeviceEntity
+from .entity import ZWaveDeviceEntity, create_entities
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -26,28 +26,32 @@ async def async_setup_entry(hass, config_entry, async_add_entities):
     """Set up Z-Wave sensor from config entry."""
 
     @callback
-    def async_add_sensor(value):
-        """Add Z-Wave Sensor."""
-        # Basic Sensor types
-        if isinstance(value.primary.value, (float, int)):
-            sensor = ZWaveNumericSensor(value)
-
-        elif isinstance(value.primary.value, dict):
-            sensor = ZWaveListSensor(value)
-
-        else:
-            _LOGGER.warning("Sensor not implemented for value %s", value.primary.label)
-            return
-
-        async_add_entities([sensor])
+    def async_add_sensor(batch):
+        """Add a batch of Z-Wave Sensors."""
+        async_add_entities(create_entities(batch, create_sensors))
 
     hass.data[DOMAIN][config_entry.entry_id][DATA_UNSUBSCRIBE].append(
-        async_dispatcher_connect(hass, "zwave_new_sensor", async_add_sensor)
+        async_dispatcher_connect(
+            hass, f"zwave_new_sensor_{config_entry.entry_id}", async_add_sensor
+        )
     )
 
     await hass.data[DOMAIN][config_entry.entry_id]["mark_platform_loaded"]("sensor")
 
 
+def create_sensors(value):
+    """Create the Z-Wave Sensors for the discovered values."""
+    # Basic Sensor types
+    if isinstance(value.primary.value, (float, int)):
+        return [ZWaveNumericSensor(value)]
+
+    if isinstance(value.primary.value, dict):
+        return [ZWaveListSensor(value)]
+
+    _LOGGER.warning("Sensor not implemented for value %s", value.primary.label)
+    return []
+
+
 class ZwaveSensorBase(ZWaveDeviceEntity):
     """Basic Representation of a Z-Wave sensor."""
 
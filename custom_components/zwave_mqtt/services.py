@@ -5,6 +5,7 @@ from openzwavemqtt.const import CommandClass, ValueType
 import voluptuous as vol
 
 from homeassistant.core import callback
+from homeassistant.exceptions import HomeAssistantError
 import homeassistant.helpers.config_validation as cv
 
 from . import const
@@ -15,11 +16,9 @@ _LOGGER = logging.getLogger(__name__)
 class ZWaveServices:
     """Class that holds our services ( Zwave Commands) that should be published to hass."""
 
-    def __init__(self, hass, manager, data_nodes):
-        """Initialize with both hass and ozwmanager objects."""
+    def __init__(self, hass):
+        """Initialize with the hass object, the managers are looked up per call."""
         self._hass = hass
-        self._manager = manager
-        self._data_nodes = data_nodes
 
     @callback
     def register(self):
@@ -32,6 +31,7 @@ class ZWaveServices:
                 {
                     vol.Optional(const.ATTR_INSTANCE_ID, default=1): vol.Coerce(int),
                     vol.Optional(const.ATTR_SECURE, default=False): vol.Coerce(bool),
+                    vol.Optional(const.ATTR_CONFIG_ENTRY_ID): cv.string,
                 }
             ),
         )
@@ -40,7 +40,10 @@ class ZWaveServices:
             const.SERVICE_REMOVE_NODE,
             self.remove_node,
             schema=vol.Schema(
-                {vol.Optional(const.ATTR_INSTANCE_ID, default=1): vol.Coerce(int)}
+                {
+                    vol.Optional(const.ATTR_INSTANCE_ID, default=1): vol.Coerce(int),
+                    vol.Optional(const.ATTR_CONFIG_ENTRY_ID): cv.string,
+                }
             ),
         )
         self._hass.services.async_register(
@@ -51,6 +54,7 @@ class ZWaveServices:
                 {
                     vol.Required(const.ATTR_NODE_ID): vol.Coerce(int),
                     vol.Optional(const.ATTR_INSTANCE_ID, default=1): vol.Coerce(int),
+                    vol.Optional(const.ATTR_CONFIG_ENTRY_ID): cv.string,
                 }
             ),
         )
@@ -62,6 +66,7 @@ class ZWaveServices:
                 {
                     vol.Required(const.ATTR_NODE_ID): vol.Coerce(int),
                     vol.Optional(const.ATTR_INSTANCE_ID, default=1): vol.Coerce(int),
+                    vol.Optional(const.ATTR_CONFIG_ENTRY_ID): cv.string,
                 }
             ),
         )
@@ -70,7 +75,10 @@ class ZWaveServices:
             const.SERVICE_CANCEL_COMMAND,
             self.cancel_command,
             schema=vol.Schema(
-                {vol.Optional(const.ATTR_INSTANCE_ID, default=1): vol.Coerce(int)}
+                {
+                    vol.Optional(const.ATTR_INSTANCE_ID, default=1): vol.Coerce(int),
+                    vol.Optional(const.ATTR_CONFIG_ENTRY_ID): cv.string,
+                }
             ),
         )
         self._hass.services.async_register(
@@ -86,53 +94,84 @@ class ZWaveServices:
                     ),
                     vol.Optional(const.ATTR_CONFIG_SIZE, default=2): vol.Coerce(int),
                     vol.Optional(const.ATTR_INSTANCE_ID, default=1): vol.Coerce(int),
+                    vol.Optional(const.ATTR_CONFIG_ENTRY_ID): cv.string,
                 }
             ),
         )
+        self._hass.services.async_register(
+            const.DOMAIN,
+            const.SERVICE_REPORT_STATISTICS,
+            self.report_statistics,
+            schema=vol.Schema({}),
+        )
+
+    @callback
+    def _get_entry_data(self, service):
+        """Return the data of the config entry serving the requested instance."""
+        instance_id = service.data[const.ATTR_INSTANCE_ID]
+        entry_id = service.data.get(const.ATTR_CONFIG_ENTRY_ID)
+        matches = [
+            entry_data
+            for config_entry_id, entry_data in self._hass.data[const.DOMAIN].items()
+            if (entry_id is None or config_entry_id == entry_id)
+            and entry_data[const.DATA_MANAGER].get_instance(instance_id) is not None
+        ]
+        if not matches:
+            raise HomeAssistantError(
+                f"No config entry serves OZW instance {instance_id}"
+            )
+        if len(matches) > 1:
+            raise HomeAssistantError(
+                f"Several config entries serve OZW instance {instance_id}, "
+                f"specify the {const.ATTR_CONFIG_ENTRY_ID}"
+            )
+        return matches[0]
+
+    @callback
+    def _get_instance(self, service):
+        """Return the requested OZW instance."""
+        instance_id = service.data[const.ATTR_INSTANCE_ID]
+        manager = self._get_entry_data(service)[const.DATA_MANAGER]
+        return manager.get_instance(instance_id)
 
     @callback
     def add_node(self, service):
         """Enter inclusion mode on the controller."""
-        instance_id = service.data[const.ATTR_INSTANCE_ID]
         secure = service.data[const.ATTR_SECURE]
-        instance = self._manager.get_instance(instance_id)
+        instance = self._get_instance(service)
         instance.add_node(secure)
 
     @callback
     def remove_node(self, service):
         """Enter exclusion mode on the controller."""
-        instance_id = service.data[const.ATTR_INSTANCE_ID]
-        instance = self._manager.get_instance(instance_id)
+        instance = self._get_instance(service)
         instance.remove_node()
 
     @callback
     def remove_failed_node(self, service):
         """Remove a failed node from the controller."""
-        instance_id = service.data[const.ATTR_INSTANCE_ID]
         node_id = service.data[const.ATTR_NODE_ID]
-        instance = self._manager.get_instance(instance_id)
+        instance = self._get_instance(service)
         instance.remove_failed_node(node_id)
 
     @callback
     def replace_failed_node(self, service):
         """Replace a failed node from the controller with a new device."""
-        instance_id = service.data[const.ATTR_INSTANCE_ID]
         node_id = service.data[const.ATTR_NODE_ID]
-        instance = self._manager.get_instance(instance_id)
+        instance = self._get_instance(service)
         instance.replace_failed_node(node_id)
 
     @callback
     def cancel_command(self, service):
         """Cancel in Controller Commands that are in progress."""
-        instance_id = service.data[const.ATTR_INSTANCE_ID]
-        instance = self._manager.get_instance(instance_id)
+        instance = self._get_instance(service)
         instance.cancel_controller_command()
 
     @callback
     def set_config_parameter(self, service):
         """Set a config parameter to a node."""
         node_id = service.data[const.ATTR_NODE_ID]
-        node = self._data_nodes[node_id]
+        node = self._get_entry_data(service)[const.DATA_NODES][node_id]
         param = service.data.get(const.ATTR_CONFIG_PARAMETER)
         selection = service.data.get(const.ATTR_CONFIG_VALUE)
         # enumerate values untill we find the param within configuration items
@@ -169,3 +208,17 @@ class ZWaveServices:
             node_id,
             selection,
         )
+
+    @callback
+    def report_statistics(self, service):
+        """Fire an event with the statistics of every config entry."""
+        for entry_id, entry_data in self._hass.data[const.DOMAIN].items():
+            statistics = {
+                name: provider.statistics
+                for name, provider in entry_data[const.DATA_STATISTICS].items()
+            }
+            _LOGGER.info("Statistics for config entry %s: %s", entry_id, statistics)
+            self._hass.bus.async_fire(
+                const.EVENT_STATISTICS,
+                {const.ATTR_CONFIG_ENTRY_ID: entry_id, **statistics},
+            )
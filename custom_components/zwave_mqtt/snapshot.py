@@ -0,0 +1,161 @@
+"""Warm-start snapshot of the retained OZW topics."""
+import logging
+import os
+
+from homeassistant.core import callback
+from homeassistant.helpers.event import async_call_later
+from homeassistant.helpers.storage import Store
+
+from .const import DOMAIN
+
+_LOGGER = logging.getLogger(__name__)
+
+STORAGE_VERSION = 1
+# Delay (seconds) before changes to the snapshot are written to disk
+SAVE_DELAY = 30
+# Seconds without new retained messages after which the replay is considered done
+RECONCILE_QUIET_PERIOD = 10
+
+
+class ZWaveSnapshot:
+    """Persist the retained node/value topics to pre-create entities on start.
+
+    On start the snapshot is replayed before the MQTT subscription is made.
+    Retained messages received from MQTT afterwards are compared against it:
+    identical messages are dropped by the payload cache, changed ones are
+    processed and topics that are no longer published are removed again.
+    """
+
+    def __init__(self, hass, entry_id, remove_topic, excluded_markers=()):
+        """Initialize the snapshot.
+
+        `remove_topic` -- Callback to remove a topic that is no longer published.
+        `excluded_markers` -- Parts of topics that should not be in the snapshot.
+        """
+        self._hass = hass
+        self._remove_topic = remove_topic
+        self._store = Store(hass, STORAGE_VERSION, f"{DOMAIN}.{entry_id}")
+        self._excluded_markers = excluded_markers
+        self._topics = {}
+        self._seen_topics = None
+        self._status_seen = False
+        self._seen_count = 0
+        self._reconcile_count = -1
+        self._unsub_reconcile = None
+        self._save_pending = False
+
+    @property
+    def topics(self):
+        """Return the topics and payloads in the snapshot."""
+        return self._topics
+
+    async def async_load(self):
+        """Load the snapshot from storage."""
+        data = await self._store.async_load()
+        if data:
+            self._topics = data["topics"]
+        _LOGGER.debug("Loaded snapshot with %s topics", len(self._topics))
+
+    @callback
+    def async_start_reconcile(self):
+        """Start tracking the live topics to remove the stale topics later on."""
+        if not self._topics:
+            return
+        self._seen_topics = set()
+        self._unsub_reconcile = async_call_later(
+            self._hass, RECONCILE_QUIET_PERIOD, self._async_check_reconcile
+        )
+
+    @callback
+    def async_record(self, topic, payload):
+        """Record a message received from MQTT."""
+        if any(marker in topic for marker in self._excluded_markers):
+            return
+
+        if self._seen_topics is not None:
+            self._seen_topics.add(topic)
+            self._seen_count += 1
+            if "/status/" in topic:
+                self._status_seen = True
+
+        if not payload:
+            self._remove_prefix(topic)
+        elif self._topics.get(topic) != payload:
+            self._topics[topic] = payload
+        else:
+            return
+        self._async_schedule_save()
+
+    @callback
+    def _async_check_reconcile(self, _now):
+        """Reconcile the snapshot once no new messages came in for a while."""
+        self._unsub_reconcile = None
+        if not self._status_seen or self._seen_count != self._reconcile_count:
+            # the (retained) topics are still coming in
+            self._reconcile_count = self._seen_count
+            self._unsub_reconcile = async_call_later(
+                self._hass, RECONCILE_QUIET_PERIOD, self._async_check_reconcile
+            )
+            return
+
+        stale_topics = [
+            topic for topic in self._topics if topic not in self._seen_topics
+        ]
+        self._seen_topics = None
+        if not stale_topics:
+            return
+
+        _LOGGER.debug("Removing %s stale topics from the snapshot", len(stale_topics))
+        # remove the deepest topics (values) before their parents
+        stale_topics.sort(key=lambda topic: topic.count("/"), reverse=True)
+        for topic in stale_topics:
+            self._topics.pop(topic, None)
+            self._remove_topic(topic)
+        self._async_schedule_save()
+
+    @callback
+    def _async_schedule_save(self):
+        """Schedule a write of the snapshot unless one is pending already."""
+        # rescheduling would postpone the write on every message of a busy mesh
+        if self._save_pending:
+            return
+        self._save_pending = True
+        self._store.async_delay_save(self._data_to_save, SAVE_DELAY)
+
+    def _remove_prefix(self, topic):
+        """Remove a topic and all the topics below it."""
+        self._topics.pop(topic, None)
+        prefix = topic if topic.endswith("/") else f"{topic}/"
+        for item in [item for item in self._topics if item.startswith(prefix)]:
+            del self._topics[item]
+
+    @callback
+    def _data_to_save(self):
+        """Return the data to store."""
+        self._save_pending = False
+        # raw (bytes) payloads are only decoded when the snapshot is written
+        return {
+            "topics": {
+                topic: payload.decode() if isinstance(payload, bytes) else payload
+                for topic, payload in self._topics.items()
+            }
+        }
+
+    async def async_shutdown(self):
+        """Stop reconciling and write the snapshot to disk."""
+        if self._unsub_reconcile is not None:
+            self._unsub_reconcile()
+            self._unsub_reconcile = None
+        await self._store.async_save(self._data_to_save())
+
+
+async def async_remove_snapshot(hass, entry_id):
+    """Remove the snapshot of a config entry from disk."""
+    store = Store(hass, STORAGE_VERSION, f"{DOMAIN}.{entry_id}")
+    await hass.async_add_executor_job(_remove_file, store.path)
+
+
+def _remove_file(path):
+    """Remove a file if it exists."""
+    if os.path.isfile(path):
+        os.remove(path)
@@ -8,7 +8,7 @@ from homeassistant.core import callback
 from homeassistant.helpers.dispatcher import async_dispatcher_connect
 
 from .const import DATA_UNSUBSCRIBE, DOMAIN
-from .entity import ZWaveDeviceEntity
+from .entity import ZWaveDeviceEntity, create_entities
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -17,14 +17,14 @@ async def async_setup_entry(hass, config_entry, async_add_entities):
     """Set up Z-Wave switch from config entry."""
 
     @callback
-    def async_add_switch(value):
-        """Add Z-Wave Switch."""
-        switch = ZWaveSwitch(value)
-
-        async_add_entities([switch])
+    def async_add_switch(batch):
+        """Add a batch of Z-Wave Switches."""
+        async_add_entities(create_entities(batch, lambda values: [ZWaveSwitch(values)]))
 
     hass.data[DOMAIN][config_entry.entry_id][DATA_UNSUBSCRIBE].append(
-        async_dispatcher_connect(hass, "zwave_new_switch", async_add_switch)
+        async_dispatcher_connect(
+            hass, f"zwave_new_switch_{config_entry.entry_id}", async_add_switch
+        )
     )
 
     await hass.data[DOMAIN][config_entry.entry_id]["mark_platform_loaded"]("switch")
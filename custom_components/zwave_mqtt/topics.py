@@ -0,0 +1,99 @@
+"""Plan the MQTT topics the zwave_mqtt integration subscribes to."""
+from openzwavemqtt.const import CommandClass
+
+from .discovery import DISCOVERY_COMMAND_CLASSES
+
+# CommandClasses that are handled outside of discovery
+EXTRA_COMMAND_CLASSES = frozenset(
+    [CommandClass.SCENE_ACTIVATION, CommandClass.CENTRAL_SCENE]
+)
+
+# CommandClasses for which the values are consumed by the integration
+SUBSCRIBED_COMMAND_CLASSES = DISCOVERY_COMMAND_CLASSES | EXTRA_COMMAND_CLASSES
+
+# Parts of topics carrying statistics
+STATISTICS_TOPIC_MARKERS = ("/statistics/",)
+
+# Parts of topics carrying events, where a repeated payload is a new event
+EVENT_TOPIC_MARKERS = ("/event/",) + tuple(
+    f"/commandclass/{command_class.value}/" for command_class in EXTRA_COMMAND_CLASSES
+)
+
+
+def plan_subscriptions(
+    topic_prefix,
+    command_classes=SUBSCRIBED_COMMAND_CLASSES,
+    statistics=False,
+    instances=None,
+):
+    """Return the MQTT topic filters for the topic families the integration uses.
+
+    Parent topics (node, instance, commandclass) are listed before their
+    children so retained messages are replayed in the right order.
+    `topic_prefix` -- Topic prefix of the OZW daemon, ending in a slash.
+    `instances` -- OZW instance ids to subscribe to, all instances if empty.
+    """
+    topics = []
+    for instance in instances or ["+"]:
+        instance_prefix = f"{topic_prefix}{instance}/"
+        topics.extend(
+            [
+                f"{instance_prefix}status/",
+                f"{instance_prefix}event/#",
+                f"{instance_prefix}node/+/",
+                f"{instance_prefix}node/+/instance/+/",
+                f"{instance_prefix}node/+/instance/+/commandclass/+/",
+            ]
+        )
+        topics.extend(
+            f"{instance_prefix}node/+/instance/+/commandclass/{command_class.value}/value/+/"
+            for command_class in sorted(command_classes)
+        )
+        if statistics:
+            topics.append(f"{instance_prefix}statistics/")
+            topics.append(f"{instance_prefix}node/+/statistics/")
+    return topics
+
+
+# Topic families consumed by the manager, as topic segments below the prefix.
+# A + matches any single segment, a trailing # matches the remaining segments.
+TOPIC_FAMILIES = (
+    ("status", ("+", "status")),
+    ("event", ("+", "event", "#")),
+    ("node", ("+", "node", "+")),
+    ("instance", ("+", "node", "+", "instance", "+")),
+    ("commandclass", ("+", "node", "+", "instance", "+", "commandclass", "+")),
+    ("value", ("+", "node", "+", "instance", "+", "commandclass", "+", "value", "+")),
+    ("statistics", ("+", "statistics")),
+    ("statistics", ("+", "node", "+", "statistics")),
+)
+
+
+def compile_topic_trie(families=TOPIC_FAMILIES):
+    """Compile the topic families into a trie of topic segments.
+
+    Every trie node is a dict of segment -> child node, the family of the
+    topics ending in a node is stored under the None key.
+    """
+    trie = {}
+    for family, segments in families:
+        node = trie
+        for segment in segments:
+            node = node.setdefault(segment, {})
+        node[None] = family
+    return trie
+
+
+def match_topic_family(trie, segments):
+    """Return the family of the topic segments or None if it is not consumed."""
+    node = trie
+    for segment in segments:
+        if "#" in node:
+            return node["#"][None]
+        child = node.get(segment)
+        if child is None:
+            child = node.get("+")
+            if child is None:
+                return None
+        node = child
+    return node.get(None)
@@ -6,10 +6,19 @@ from pathlib import Path
 from unittest.mock import Mock
 
 from asynctest import patch
-from custom_components.zwave_mqtt.const import DOMAIN
+from custom_components.zwave_mqtt.const import (
+    CONF_INSTANCES,
+    CONF_SUBSCRIBE_STATISTICS,
+    CONF_TOPIC_PREFIX,
+    DEFAULT_SUBSCRIBE_STATISTICS,
+    DOMAIN,
+)
+from custom_components.zwave_mqtt.topics import plan_subscriptions
 
 from homeassistant import config_entries, core as ha
+from homeassistant.const import EVENT_TIME_CHANGED
 from homeassistant.helpers import storage
+import homeassistant.util.dt as dt_util
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -65,9 +74,11 @@ def mock_storage(data=None):
         yield data
 
 
-async def setup_zwave(hass, fixture=None):
+async def setup_zwave(hass, fixture=None, options=None, data=None):
     """Set up Z-Wave and load a dump."""
     hass.config.components.add("mqtt")
+    data = data or {}
+    topic_prefix = data.get(CONF_TOPIC_PREFIX, "OpenZWave")
 
     with patch("homeassistant.components.mqtt.async_subscribe") as mock_subscribe:
         await hass.config_entries.async_add(
@@ -75,31 +86,47 @@ async def setup_zwave(hass, fixture=None):
                 1,
                 DOMAIN,
                 "Z-Wave",
-                {},
+                data,
                 config_entries.SOURCE_USER,
                 config_entries.CONN_CLASS_LOCAL_PUSH,
                 {},
+                options,
             )
         )
         await hass.async_block_till_done()
 
     assert "zwave_mqtt" in hass.config.components
-    assert len(mock_subscribe.mock_calls) == 1
+    subscribed_topics = [call[1][1] for call in mock_subscribe.mock_calls]
+    assert subscribed_topics == plan_subscriptions(
+        f"{topic_prefix}/",
+        statistics=(options or {}).get(
+            CONF_SUBSCRIBE_STATISTICS, DEFAULT_SUBSCRIBE_STATISTICS
+        ),
+        instances=data.get(CONF_INSTANCES),
+    )
+    # the status is received before the nodes, so the entities start available
+    assert subscribed_topics[0].endswith("/status/")
+    # all topics are subscribed with the same message callback
     receive_message = mock_subscribe.mock_calls[0][1][2]
 
     if fixture is not None:
-        data = Path(__file__).parent / "fixtures" / fixture
-
-        with data.open("rt") as fp:
-            for line in fp:
-                topic, payload = line.strip().split(",", 1)
-                receive_message(Mock(topic=topic, payload=payload))
+        for topic, payload in load_dump(fixture):
+            # the dumps are recorded with the default topic prefix
+            topic = topic.replace("OpenZWave/", f"{topic_prefix}/", 1)
+            receive_message(Mock(topic=topic, payload=payload))
 
         await hass.async_block_till_done()
 
     return receive_message
 
 
+def load_dump(fixture="generic_network_dump.csv"):
+    """Load a network dump as a list of (topic, payload) tuples."""
+    path = Path(__file__).parent / "fixtures" / fixture
+    with path.open("rt") as fp:
+        return [tuple(line.strip().split(",", 1)) for line in fp]
+
+
 def async_capture_events(hass, event_name):
     """Create a helper that captures events."""
     events = []
@@ -111,3 +138,9 @@ def async_capture_events(hass, event_name):
     hass.bus.async_listen(event_name, capture_events)
 
     return events
+
+
+@ha.callback
+def async_fire_time_changed(hass, time):
+    """Fire a time changed event."""
+    hass.bus.async_fire(EVENT_TIME_CHANGED, {"now": dt_util.as_utc(time)})
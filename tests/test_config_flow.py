@@ -0,0 +1,60 @@
+"""Test the zwave_mqtt config flow."""
+from asynctest import patch
+from custom_components.zwave_mqtt.const import CONF_INSTANCES, CONF_TOPIC_PREFIX, DOMAIN
+
+from homeassistant import config_entries
+
+
+async def test_user_create_entry(hass):
+    """Test an entry is created for a topic prefix and instance set."""
+    hass.config.components.add("mqtt")
+    result = await hass.config_entries.flow.async_init(
+        DOMAIN, context={"source": config_entries.SOURCE_USER}
+    )
+    assert result["type"] == "form"
+    assert result["step_id"] == "user"
+
+    with patch("custom_components.zwave_mqtt.async_setup_entry", return_value=True):
+        result = await hass.config_entries.flow.async_configure(
+            result["flow_id"], {CONF_TOPIC_PREFIX: "Building2/", CONF_INSTANCES: "2, 1"}
+        )
+        await hass.async_block_till_done()
+
+    assert result["type"] == "create_entry"
+    assert result["title"] == "Z-Wave MQTT (Building2, instances 1, 2)"
+    assert result["data"] == {CONF_TOPIC_PREFIX: "Building2", CONF_INSTANCES: [1, 2]}
+
+
+async def test_user_invalid_instances(hass):
+    """Test the instances must be a list of numbers."""
+    hass.config.components.add("mqtt")
+    result = await hass.config_entries.flow.async_init(
+        DOMAIN,
+        context={"source": config_entries.SOURCE_USER},
+        data={CONF_TOPIC_PREFIX: "OpenZWave", CONF_INSTANCES: "one"},
+    )
+
+    assert result["type"] == "form"
+    assert result["errors"] == {CONF_INSTANCES: "invalid_instances"}
+
+
+async def test_user_already_configured(hass):
+    """Test instances can only be served by a single entry."""
+    hass.config.components.add("mqtt")
+    with patch("custom_components.zwave_mqtt.async_setup_entry", return_value=True):
+        result = await hass.config_entries.flow.async_init(
+            DOMAIN,
+            context={"source": config_entries.SOURCE_USER},
+            data={CONF_TOPIC_PREFIX: "OpenZWave", CONF_INSTANCES: "1"},
+        )
+        assert result["type"] == "create_entry"
+        await hass.async_block_till_done()
+
+    # Another daemon (prefix) is fine, all instances of the same daemon is not
+    result = await hass.config_entries.flow.async_init(
+        DOMAIN,
+        context={"source": config_entries.SOURCE_USER},
+        data={CONF_TOPIC_PREFIX: "OpenZWave", CONF_INSTANCES: ""},
+    )
+    assert result["type"] == "abort"
+    assert result["reason"] == "already_configured"
@@ -0,0 +1,84 @@
+"""Test Z-Wave discovery."""
+from pathlib import Path
+from unittest.mock import Mock
+
+from custom_components.zwave_mqtt import const
+from custom_components.zwave_mqtt.discovery import (
+    COMPILED_SCHEMAS,
+    DISCOVERY_SCHEMAS,
+    check_node_schema,
+    check_value_schema,
+    get_matching_schemas,
+)
+from custom_components.zwave_mqtt.entity import (
+    ZWaveDeviceEntityValues,
+    get_values_class,
+)
+from openzwavemqtt import OZWManager, OZWOptions
+from openzwavemqtt.const import EVENT_VALUE_ADDED
+
+
+def test_compiled_discovery():
+    """Test the compiled schemas match the same values as the plain schemas."""
+    options = OZWOptions(send_message=lambda topic, payload: None)
+    manager = OZWManager(options)
+    values = []
+    options.listen(EVENT_VALUE_ADDED, values.append)
+
+    data = Path(__file__).parent / "fixtures" / "generic_network_dump.csv"
+    with data.open("rt") as fp:
+        for line in fp:
+            topic, payload = line.strip().split(",", 1)
+            manager.receive_message(topic, payload)
+
+    assert values
+    discovered = 0
+    for value in values:
+        expected = [
+            schema
+            for schema in DISCOVERY_SCHEMAS
+            if check_node_schema(value.node, schema)
+            and check_value_schema(value, schema[const.DISC_VALUES][const.DISC_PRIMARY])
+        ]
+        compiled = get_matching_schemas(value.node, value)
+        assert [schema.schema for schema in compiled] == expected
+        discovered += len(compiled)
+
+    assert discovered > 0
+
+
+def test_values_class_per_schema():
+    """Test the values are stored in the slots of a class per schema."""
+    schema = next(
+        schema
+        for schemas in COMPILED_SCHEMAS.values()
+        for schema in schemas
+        if schema.component == "light"
+    )
+    primary = Mock(node=Mock(node_id=2), instance=1)
+    values = ZWaveDeviceEntityValues(None, None, schema, primary, Mock(), Mock())
+
+    assert isinstance(values, ZWaveDeviceEntityValues)
+    assert type(values) is get_values_class(schema)
+    assert not hasattr(values, "__dict__")
+    assert values.primary is primary
+    assert values.dimming_duration is None
+    # values that are not in the schema are None as well
+    assert values.target is None
+    assert "dimming_duration" in values
+    assert "target" not in values
+    assert list(values) == [primary, None, None, None]
+
+
+def test_values_class_single_value():
+    """Test iterating the values of a schema with only a primary value."""
+    schema = next(
+        schema
+        for schemas in COMPILED_SCHEMAS.values()
+        for schema in schemas
+        if tuple(schema.values) == ("primary",)
+    )
+    primary = Mock(node=Mock(node_id=2), instance=1)
+    values = ZWaveDeviceEntityValues(None, None, schema, primary, Mock(), Mock())
+
+    assert list(values) == [primary]
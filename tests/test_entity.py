@@ -0,0 +1,274 @@
+"""Test the generic Z-Wave entity logic."""
+from datetime import timedelta
+import json
+from pathlib import Path
+from unittest.mock import Mock
+
+from custom_components.zwave_mqtt import DOMAIN, const
+from custom_components.zwave_mqtt.entity import ZWaveValuesRegistry, create_entities
+
+from homeassistant.const import STATE_UNAVAILABLE
+import homeassistant.util.dt as dt_util
+
+from tests.common import async_capture_events, async_fire_time_changed, setup_zwave
+
+VOLTAGE_ENTITY_ID = "sensor.smart_plug_electric_v"
+
+
+def voltage_message(value, timestamp=1579566943):
+    """Return a MQTT message changing the voltage of the smart plug."""
+    return Mock(
+        topic="OpenZWave/1/node/32/instance/1/commandclass/50/value/1125900448727058/",
+        payload=json.dumps(
+            {
+                "Label": "Electric - V",
+                "Value": value,
+                "Units": "V",
+                "Min": 0,
+                "Max": 0,
+                "Type": "Decimal",
+                "Instance": 1,
+                "CommandClass": "COMMAND_CLASS_METER",
+                "Index": 4,
+                "Node": 32,
+                "Genre": "User",
+                "Help": "",
+                "ValueIDKey": 1125900448727058,
+                "ReadOnly": False,
+                "WriteOnly": False,
+                "ValueSet": False,
+                "ValuePolled": False,
+                "ChangeVerified": False,
+                "Event": "valueChanged",
+                "TimeStamp": timestamp,
+            }
+        ),
+    )
+
+
+def voltage_state_changes(events):
+    """Return the state changed events of the voltage sensor."""
+    return [event for event in events if event.data["entity_id"] == VOLTAGE_ENTITY_ID]
+
+
+async def test_state_writes_not_coalesced(hass):
+    """Test every value change results in a state write by default."""
+    receive_message = await setup_zwave(hass, "generic_network_dump.csv")
+    events = async_capture_events(hass, "state_changed")
+
+    receive_message(voltage_message(230.1))
+    receive_message(voltage_message(230.2))
+    await hass.async_block_till_done()
+
+    assert len(voltage_state_changes(events)) == 2
+    assert hass.states.get(VOLTAGE_ENTITY_ID).state == "230.2"
+
+
+async def test_state_writes_coalesced(hass):
+    """Test value changes within the window result in one state write."""
+    receive_message = await setup_zwave(
+        hass,
+        "generic_network_dump.csv",
+        options={
+            const.CONF_COALESCE_STATE_WRITES: True,
+            const.CONF_STATE_WRITE_WINDOW: 5,
+        },
+    )
+    events = async_capture_events(hass, "state_changed")
+    statistics = async_capture_events(hass, const.EVENT_STATISTICS)
+
+    receive_message(voltage_message(230.1))
+    await hass.async_block_till_done()
+    receive_message(voltage_message(230.2))
+    receive_message(voltage_message(230.3))
+    await hass.async_block_till_done()
+    assert len(voltage_state_changes(events)) == 0
+
+    async_fire_time_changed(hass, dt_util.utcnow() + timedelta(seconds=5))
+    await hass.async_block_till_done()
+
+    assert len(voltage_state_changes(events)) == 1
+    assert hass.states.get(VOLTAGE_ENTITY_ID).state == "230.3"
+
+    await hass.services.async_call(
+        DOMAIN, const.SERVICE_REPORT_STATISTICS, {}, blocking=True
+    )
+    await hass.async_block_till_done()
+    assert len(statistics) == 1
+    assert statistics[0].data["state_writes"]["saved"] >= 2
+
+
+async def test_unchanged_state_not_written(hass):
+    """Test a value change that does not change the state is not written."""
+    receive_message = await setup_zwave(hass, "generic_network_dump.csv")
+    statistics = async_capture_events(hass, const.EVENT_STATISTICS)
+
+    receive_message(voltage_message(230.1))
+    await hass.async_block_till_done()
+    state = hass.states.get(VOLTAGE_ENTITY_ID)
+    assert state.state == "230.1"
+
+    # Same value reported again, the payload differs in the timestamp only
+    receive_message(voltage_message(230.1, timestamp=1579566999))
+    await hass.async_block_till_done()
+    assert hass.states.get(VOLTAGE_ENTITY_ID) is state
+
+    await hass.services.async_call(
+        DOMAIN, const.SERVICE_REPORT_STATISTICS, {}, blocking=True
+    )
+    await hass.async_block_till_done()
+    assert statistics[0].data["state_writes"]["unchanged"] == 1
+
+
+def test_create_entities_skips_failing_values():
+    """Test values failing to create their entity do not drop the batch."""
+
+    def create(values):
+        if values.primary == "broken":
+            raise KeyError("Selected_id")
+        return [values.primary]
+
+    batch = [Mock(primary="first"), Mock(primary="broken"), Mock(primary="last")]
+    assert create_entities(batch, create) == ["first", "last"]
+
+
+def test_values_registry_stress():
+    """Test adding and removing thousands of values objects."""
+    registry = ZWaveValuesRegistry()
+    for node_id in range(1, 51):
+        for index in range(100):
+            registry.add(node_id, (node_id, index), Mock(values_id=(node_id, index)))
+            if index % 10 == 0:
+                # a second schema matching the same primary value
+                registry.add(
+                    node_id, (node_id, index), Mock(values_id=(node_id, index))
+                )
+
+    assert len(registry) == 5500
+    assert registry.has(7, (7, 42))
+    assert not registry.has(7, (8, 42))
+
+    # values can be removed while iterating over a snapshot
+    for values in registry.snapshot(7):
+        registry.remove(7, values.values_id)
+    assert registry.snapshot(7) == []
+    assert len(registry) == 5390
+
+    removed = 0
+    for node_id in range(1, 51):
+        for index in range(0, 100, 2):
+            removed += len(registry.remove(node_id, (node_id, index)))
+    assert removed == 49 * 60
+    assert len(registry) == 49 * 50
+    assert len(registry.snapshot()) == 49 * 50
+
+    for values in registry.snapshot():
+        registry.remove(values.values_id[0], values.values_id)
+    assert len(registry) == 0
+    assert registry.remove(7, (7, 1)) == ()
+
+
+async def test_state_writes_suppressed_during_replay(hass):
+    """Test states are written once when the startup replay is done."""
+    receive_message = await setup_zwave(
+        hass,
+        "generic_network_dump.csv",
+        options={const.CONF_SUPPRESS_REPLAY_WRITES: True},
+    )
+    events = async_capture_events(hass, "state_changed")
+
+    receive_message(voltage_message(230.1))
+    receive_message(voltage_message(230.2))
+    await hass.async_block_till_done()
+    assert len(voltage_state_changes(events)) == 0
+
+    # the daemon restarted and is done querying all nodes
+    receive_message(
+        Mock(
+            topic="OpenZWave/1/status/",
+            payload=json.dumps({"Status": "driverAllNodesQueried", "TimeStamp": 1}),
+        )
+    )
+    await hass.async_block_till_done()
+
+    assert len(voltage_state_changes(events)) == 1
+    assert hass.states.get(VOLTAGE_ENTITY_ID).state == "230.2"
+
+    receive_message(voltage_message(230.3))
+    await hass.async_block_till_done()
+    assert len(voltage_state_changes(events)) == 2
+
+
+async def test_replay_quiet_period_starts_with_first_write(hass):
+    """Test the replay ends once state writes are quiet after the first one."""
+    receive_message = await setup_zwave(
+        hass,
+        "generic_network_dump.csv",
+        options={const.CONF_SUPPRESS_REPLAY_WRITES: True},
+    )
+    state = hass.states.get(VOLTAGE_ENTITY_ID).state
+
+    # no writes were requested yet, so the replay is still running
+    async_fire_time_changed(hass, dt_util.utcnow() + timedelta(seconds=10))
+    await hass.async_block_till_done()
+    receive_message(voltage_message(230.1))
+    await hass.async_block_till_done()
+    assert hass.states.get(VOLTAGE_ENTITY_ID).state == state
+
+    first_write = dt_util.utcnow()
+    async_fire_time_changed(hass, first_write + timedelta(seconds=4))
+    await hass.async_block_till_done()
+    assert hass.states.get(VOLTAGE_ENTITY_ID).state == state
+
+    async_fire_time_changed(hass, first_write + timedelta(seconds=6))
+    await hass.async_block_till_done()
+    assert hass.states.get(VOLTAGE_ENTITY_ID).state == "230.1"
+
+
+def status_message(status):
+    """Return a MQTT message changing the status of the OZW instance."""
+    return Mock(
+        topic="OpenZWave/1/status/",
+        payload=json.dumps({"Status": status, "TimeStamp": 1579566950}),
+    )
+
+
+async def test_availability_flips(hass):
+    """Test entities are only written when their availability flips."""
+    receive_message = await setup_zwave(hass, "generic_network_dump.csv")
+    events = async_capture_events(hass, "state_changed")
+    assert hass.states.get(VOLTAGE_ENTITY_ID).state != STATE_UNAVAILABLE
+
+    receive_message(status_message("driverReset"))
+    await hass.async_block_till_done()
+    assert len(voltage_state_changes(events)) == 1
+    assert hass.states.get(VOLTAGE_ENTITY_ID).state == STATE_UNAVAILABLE
+
+    # still unavailable, nothing is written
+    receive_message(status_message("driverFailed"))
+    await hass.async_block_till_done()
+    assert len(voltage_state_changes(events)) == 1
+
+    receive_message(status_message("driverAllNodesQueried"))
+    await hass.async_block_till_done()
+    assert len(voltage_state_changes(events)) == 2
+    assert hass.states.get(VOLTAGE_ENTITY_ID).state != STATE_UNAVAILABLE
+
+
+async def test_availability_status_after_entities(hass):
+    """Test entities become available when the status arrives after them."""
+    receive_message = await setup_zwave(hass)
+
+    data = Path(__file__).parent / "fixtures" / "generic_network_dump.csv"
+    with data.open("rt") as fp:
+        for line in fp:
+            topic, payload = line.strip().split(",", 1)
+            if not topic.endswith("/status/"):
+                receive_message(Mock(topic=topic, payload=payload))
+    await hass.async_block_till_done()
+    assert hass.states.get(VOLTAGE_ENTITY_ID).state == STATE_UNAVAILABLE
+
+    # the first status of the instance does not fire a changed event
+    receive_message(status_message("driverAllNodesQueried"))
+    await hass.async_block_till_done()
+    assert hass.states.get(VOLTAGE_ENTITY_ID).state != STATE_UNAVAILABLE
@@ -1,8 +1,21 @@
 """Test integration initialization."""
+import json
+from pathlib import Path
+from unittest.mock import Mock
 
+from asynctest import patch
 from custom_components.zwave_mqtt import DOMAIN, PLATFORMS, const
+from custom_components.zwave_mqtt.topics import EVENT_TOPIC_MARKERS
+import pytest
 
-from tests.common import setup_zwave
+from homeassistant.components.light import SUPPORT_TRANSITION
+from homeassistant.exceptions import HomeAssistantError
+from homeassistant.helpers.device_registry import (
+    EVENT_DEVICE_REGISTRY_UPDATED,
+    async_get_registry as get_dev_reg,
+)
+
+from tests.common import async_capture_events, load_dump, setup_zwave
 
 
 async def test_init_entry(hass):
@@ -22,3 +35,327 @@ async def test_init_entry(hass):
     assert hass.services.has_service(DOMAIN, const.SERVICE_REPLACE_FAILED_NODE)
     assert hass.services.has_service(DOMAIN, const.SERVICE_CANCEL_COMMAND)
     assert hass.services.has_service(DOMAIN, const.SERVICE_SET_CONFIG_PARAMETER)
+    assert hass.services.has_service(DOMAIN, const.SERVICE_REPORT_STATISTICS)
+
+
+async def test_ingestion_statistics(hass):
+    """Test all received messages are processed by the ingestion queue."""
+    await setup_zwave(hass, "generic_network_dump.csv")
+    events = async_capture_events(hass, const.EVENT_STATISTICS)
+
+    await hass.services.async_call(
+        DOMAIN, const.SERVICE_REPORT_STATISTICS, {}, blocking=True
+    )
+    await hass.async_block_till_done()
+
+    assert len(events) == 1
+    statistics = events[0].data["ingestion"]
+    assert statistics["received"] == len(load_dump())
+    assert statistics["processed"] == len(load_dump())
+    assert statistics["queue_depth"] == 0
+    assert statistics["batches"] >= 1
+
+
+async def test_duplicate_payloads_dropped(hass):
+    """Test redelivered retained messages are not processed again."""
+    receive_message = await setup_zwave(hass, "generic_network_dump.csv")
+    events = async_capture_events(hass, const.EVENT_STATISTICS)
+
+    # MQTT reconnects and the broker redelivers all retained messages
+    messages = load_dump()
+    for topic, payload in messages:
+        receive_message(Mock(topic=topic, payload=payload))
+    await hass.async_block_till_done()
+
+    await hass.services.async_call(
+        DOMAIN, const.SERVICE_REPORT_STATISTICS, {}, blocking=True
+    )
+    await hass.async_block_till_done()
+
+    # repeated events (scenes) are never dropped
+    event_messages = sum(
+        any(marker in topic for marker in EVENT_TOPIC_MARKERS) for topic, _ in messages
+    )
+    retained_messages = len(messages) - event_messages
+    assert events[0].data["ingestion"]["received"] == len(messages) + event_messages
+    assert events[0].data["duplicates"]["hits"] == retained_messages
+    assert events[0].data["duplicates"]["misses"] == retained_messages
+
+
+async def test_republished_payloads_after_removal(hass):
+    """Test payloads republished right after the removal of a node are processed."""
+    receive_message = await setup_zwave(hass, "generic_network_dump.csv")
+    events = async_capture_events(hass, const.EVENT_STATISTICS)
+
+    # the node is removed and published again before the queue is drained
+    receive_message(Mock(topic="OpenZWave/1/node/32/", payload=""))
+    republished = 0
+    for topic, payload in load_dump():
+        if topic.startswith("OpenZWave/1/node/32/"):
+            receive_message(Mock(topic=topic, payload=payload))
+            republished += 1
+    await hass.async_block_till_done()
+
+    await hass.services.async_call(
+        DOMAIN, const.SERVICE_REPORT_STATISTICS, {}, blocking=True
+    )
+    await hass.async_block_till_done()
+
+    assert republished > 1
+    assert events[0].data["duplicates"]["hits"] == 0
+    assert events[0].data["ingestion"]["received"] == (
+        len(load_dump()) + 1 + republished
+    )
+
+
+async def test_warm_start(hass, hass_storage):
+    """Test entities are created from the snapshot of the previous run."""
+    await setup_zwave(
+        hass, "generic_network_dump.csv", options={const.CONF_WARM_START: True}
+    )
+    entry = hass.config_entries.async_entries(DOMAIN)[0]
+    assert hass.states.get("switch.smart_plug_switch") is not None
+
+    assert await hass.config_entries.async_unload(entry.entry_id)
+    await hass.async_block_till_done()
+    snapshot = hass_storage[f"{DOMAIN}.{entry.entry_id}"]["data"]["topics"]
+    assert "OpenZWave/1/node/32/" in snapshot
+
+    # Set up again without receiving anything from MQTT
+    with patch("homeassistant.components.mqtt.async_subscribe"):
+        assert await hass.config_entries.async_setup(entry.entry_id)
+        await hass.async_block_till_done()
+
+    state = hass.states.get("switch.smart_plug_switch")
+    assert state is not None
+    assert state.state == "off"
+
+
+async def test_discovery_before_platform_loaded(hass):
+    """Test entities discovered before their platform is loaded are added later."""
+    with patch(
+        "homeassistant.config_entries.ConfigEntries.async_forward_entry_setup",
+        return_value=True,
+    ):
+        await setup_zwave(hass, "generic_network_dump.csv")
+
+    # MQTT messages are processed, but the switch platform is not loaded yet
+    assert hass.states.get("switch.smart_plug_switch") is None
+
+    entry = hass.config_entries.async_entries(DOMAIN)[0]
+    await hass.config_entries.async_forward_entry_setup(entry, "switch")
+    await hass.async_block_till_done()
+
+    state = hass.states.get("switch.smart_plug_switch")
+    assert state is not None
+    assert state.state == "off"
+
+
+async def test_batched_entity_adds(hass):
+    """Test entities discovered together are added in one batch per platform."""
+    await setup_zwave(hass, "generic_network_dump.csv")
+    events = async_capture_events(hass, const.EVENT_STATISTICS)
+
+    await hass.services.async_call(
+        DOMAIN, const.SERVICE_REPORT_STATISTICS, {}, blocking=True
+    )
+    await hass.async_block_till_done()
+
+    statistics = events[0].data["platforms"]
+    assert statistics["loaded_platforms"] == len(PLATFORMS)
+    assert statistics["pending"] == 0
+    assert statistics["added"] == 27
+    assert statistics["batches"] < statistics["added"]
+
+
+async def test_multiple_daemons(hass, sent_messages):
+    """Test config entries for different daemons are independent."""
+    await setup_zwave(hass, "generic_network_dump.csv")
+    receive_message_2 = await setup_zwave(
+        hass, "generic_network_dump.csv", data={const.CONF_TOPIC_PREFIX: "Building2"}
+    )
+    entry_1, entry_2 = hass.config_entries.async_entries(DOMAIN)
+
+    # The same node of both daemons results in two entities
+    assert hass.states.get("switch.smart_plug_switch") is not None
+    assert hass.states.get("switch.smart_plug_switch_2") is not None
+
+    # A value change of the second daemon only updates its own entity
+    topic = "instance/1/commandclass/37/value/541671440/"
+    switch_value = load_node_topic(32, topic)
+    switch_value["Value"] = True
+    receive_message_2(
+        Mock(topic=f"Building2/1/node/32/{topic}", payload=json.dumps(switch_value))
+    )
+    await hass.async_block_till_done()
+    assert hass.states.get("switch.smart_plug_switch").state == "off"
+    assert hass.states.get("switch.smart_plug_switch_2").state == "on"
+
+    # Both daemons serve instance 1, so the config entry has to be specified
+    with pytest.raises(HomeAssistantError):
+        await hass.services.async_call(
+            DOMAIN, const.SERVICE_REMOVE_NODE, {}, blocking=True
+        )
+    assert sent_messages == []
+
+    for entry in (entry_1, entry_2):
+        await hass.services.async_call(
+            DOMAIN,
+            const.SERVICE_REMOVE_NODE,
+            {const.ATTR_CONFIG_ENTRY_ID: entry.entry_id},
+            blocking=True,
+        )
+    assert sent_messages[0]["topic"] == "OpenZWave/1/command/removenode/"
+    assert sent_messages[1]["topic"] == "Building2/1/command/removenode/"
+
+    # Unloading one daemon leaves the other one running
+    assert await hass.config_entries.async_unload(entry_2.entry_id)
+    await hass.async_block_till_done()
+    assert hass.states.get("switch.smart_plug_switch").state == "off"
+    assert entry_1.entry_id in hass.data[DOMAIN]
+
+
+async def test_raw_payloads(hass, hass_storage):
+    """Test raw (bytes) payloads are decoded and stored as text in the snapshot."""
+    receive_message = await setup_zwave(
+        hass, options={const.CONF_RAW_PAYLOADS: True, const.CONF_WARM_START: True}
+    )
+
+    data = Path(__file__).parent / "fixtures" / "generic_network_dump.csv"
+    with data.open("rt") as fp:
+        for line in fp:
+            topic, payload = line.strip().split(",", 1)
+            receive_message(Mock(topic=topic, payload=payload.encode()))
+    await hass.async_block_till_done()
+
+    state = hass.states.get("switch.smart_plug_switch")
+    assert state is not None
+    assert state.state == "off"
+
+    entry = hass.config_entries.async_entries(DOMAIN)[0]
+    assert await hass.config_entries.async_unload(entry.entry_id)
+    await hass.async_block_till_done()
+    snapshot = hass_storage[f"{DOMAIN}.{entry.entry_id}"]["data"]["topics"]
+    assert isinstance(snapshot["OpenZWave/1/node/32/"], str)
+
+
+async def test_topic_router(hass):
+    """Test the messages are routed by their topic family when enabled."""
+    await setup_zwave(
+        hass, "generic_network_dump.csv", options={const.CONF_TOPIC_ROUTER: True}
+    )
+    events = async_capture_events(hass, const.EVENT_STATISTICS)
+
+    state = hass.states.get("switch.smart_plug_switch")
+    assert state is not None
+    assert state.state == "off"
+
+    await hass.services.async_call(
+        DOMAIN, const.SERVICE_REPORT_STATISTICS, {}, blocking=True
+    )
+    await hass.async_block_till_done()
+    assert events[0].data["routes"]["misses"] == len(load_dump())
+
+
+def load_node(node_id):
+    """Load the payload of a node from the network dump fixture."""
+    return load_node_topic(node_id, "")
+
+
+def load_node_topic(node_id, topic):
+    """Load the payload of a topic of a node from the network dump fixture."""
+    data = Path(__file__).parent / "fixtures" / "generic_network_dump.csv"
+    with data.open("rt") as fp:
+        return next(
+            json.loads(line.strip().split(",", 1)[1])
+            for line in fp
+            if line.startswith(f"OpenZWave/1/node/{node_id}/{topic},")
+        )
+
+
+async def test_node_update_device_registry(hass):
+    """Test node changes are only written to the device registry when they differ."""
+    receive_message = await setup_zwave(hass, "generic_network_dump.csv")
+    dev_reg = await get_dev_reg(hass)
+    device = dev_reg.async_get_device({(DOMAIN, "1.32.1")}, set())
+    assert device.name == "Smart Plug"
+
+    node = load_node(32)
+    events = async_capture_events(hass, EVENT_DEVICE_REGISTRY_UPDATED)
+
+    # a change of a field that is not in the device registry
+    node["isAwake"] = False
+    receive_message(Mock(topic="OpenZWave/1/node/32/", payload=json.dumps(node)))
+    await hass.async_block_till_done()
+    assert len(events) == 0
+
+    node["MetaData"]["Name"] = "Kitchen Plug"
+    receive_message(Mock(topic="OpenZWave/1/node/32/", payload=json.dumps(node)))
+    await hass.async_block_till_done()
+    assert len(events) == 1
+    assert dev_reg.async_get(device.id).name == "Kitchen Plug"
+
+
+async def test_node_updates_suppressed(hass):
+    """Test repeated node changes are coalesced and compared before updating."""
+    receive_message = await setup_zwave(hass, "generic_network_dump.csv")
+    events = async_capture_events(hass, const.EVENT_STATISTICS)
+    node = load_node(32)
+
+    # the node is published a few times during an interview stage
+    for stage in ("Dynamic", "Configuration", "Complete"):
+        node["NodeQueryStage"] = stage
+        receive_message(Mock(topic="OpenZWave/1/node/32/", payload=json.dumps(node)))
+    await hass.async_block_till_done()
+
+    # a later change that does not touch the name, manufacturer or model
+    node["NodeQueryStage"] = "Probe"
+    receive_message(Mock(topic="OpenZWave/1/node/32/", payload=json.dumps(node)))
+    await hass.async_block_till_done()
+
+    await hass.services.async_call(
+        DOMAIN, const.SERVICE_REPORT_STATISTICS, {}, blocking=True
+    )
+    await hass.async_block_till_done()
+
+    statistics = events[0].data["node_updates"]
+    assert statistics["received"] == 4
+    assert statistics["coalesced"] == 2
+    assert statistics["unchanged"] == 1
+    assert statistics["updates"] == 1
+    assert statistics["suppressed"] == statistics["coalesced"] + statistics["unchanged"]
+    assert statistics["updates"] + statistics["suppressed"] == statistics["received"]
+
+
+async def test_discovery_held_until_query_stage(hass):
+    """Test nodes are only discovered once their interview reached the stage."""
+    receive_message = await setup_zwave(
+        hass,
+        "generic_network_dump.csv",
+        options={const.CONF_DISCOVERY_STAGE: "Complete"},
+    )
+    events = async_capture_events(hass, const.EVENT_STATISTICS)
+
+    # the smart plug is interviewed completely, the bulb is not
+    assert hass.states.get("switch.smart_plug_switch") is not None
+    assert hass.states.get("light.led_bulb_6_multi_colour_level") is None
+
+    node = load_node(39)
+    node["NodeQueryStage"] = "Complete"
+    receive_message(Mock(topic="OpenZWave/1/node/39/", payload=json.dumps(node)))
+    await hass.async_block_till_done()
+
+    state = hass.states.get("light.led_bulb_6_multi_colour_level")
+    assert state is not None
+    # the optional values were discovered together with the primary value
+    assert state.attributes["supported_features"] & SUPPORT_TRANSITION
+
+    await hass.services.async_call(
+        DOMAIN, const.SERVICE_REPORT_STATISTICS, {}, blocking=True
+    )
+    await hass.async_block_till_done()
+
+    statistics = events[0].data["discovery"]
+    assert statistics["held_nodes"] == 2
+    assert statistics["released_by_stage"] == 1
+    assert statistics["released_by_timeout"] == 0
@@ -1,7 +1,8 @@
 """Test Z-Wave Lights."""
+from custom_components.zwave_mqtt import DOMAIN, const
 from custom_components.zwave_mqtt.light import byte_to_zwave_brightness
 
-from tests.common import setup_zwave
+from tests.common import async_capture_events, setup_zwave
 
 
 async def test_light(hass, sent_messages):
@@ -43,3 +44,46 @@ async def test_light(hass, sent_messages):
     msg = sent_messages[1]
     assert msg["topic"] == "OpenZWave/1/command/setvalue/"
     assert msg["payload"] == {"Value": 0, "ValueIDKey": 659128337}
+
+
+async def test_light_commands_coalesced(hass, sent_messages):
+    """Test repeated brightness commands within the window are coalesced."""
+    await setup_zwave(
+        hass, "generic_network_dump.csv", options={const.CONF_COMMAND_WINDOW: 60}
+    )
+    events = async_capture_events(hass, const.EVENT_STATISTICS)
+
+    # Drag the brightness slider
+    for brightness in (10, 20, 30):
+        await hass.services.async_call(
+            "light",
+            "turn_on",
+            {
+                "entity_id": "light.led_bulb_6_multi_colour_level",
+                "brightness": brightness,
+            },
+            blocking=True,
+        )
+
+    # The first command is sent right away, the others are pending
+    assert len(sent_messages) == 1
+    assert sent_messages[0]["payload"] == {
+        "Value": byte_to_zwave_brightness(10),
+        "ValueIDKey": 659128337,
+    }
+
+    await hass.services.async_call(
+        DOMAIN, const.SERVICE_REPORT_STATISTICS, {}, blocking=True
+    )
+    await hass.async_block_till_done()
+    assert events[0].data["commands"]["frames_avoided"] == 1
+    assert events[0].data["commands"]["pending"] == 1
+
+    # Only the latest target is sent (on unload the pending commands are sent)
+    entry = hass.config_entries.async_entries(DOMAIN)[0]
+    assert await hass.config_entries.async_unload(entry.entry_id)
+    assert len(sent_messages) == 2
+    assert sent_messages[1]["payload"] == {
+        "Value": byte_to_zwave_brightness(30),
+        "ValueIDKey": 659128337,
+    }
@@ -0,0 +1,90 @@
+"""Test the scheduling of the outbound commands."""
+import asyncio
+
+from custom_components.zwave_mqtt.outbound import (
+    ZWaveCommandLatencyTracker,
+    ZWaveCommandScheduler,
+    decode_value_id_key,
+)
+from openzwavemqtt.const import CommandClass
+
+SET_VALUE = "OpenZWave/1/command/setvalue/"
+
+
+def value_id_key(node_id, command_class, index=0):
+    """Return a ValueIDKey for a value of the node."""
+    return (index << 48) | (node_id << 24) | (1 << 22) | (command_class << 14) | 0x10
+
+
+def test_decode_value_id_key():
+    """Test the node and CommandClass are decoded from a ValueIDKey."""
+    # Switch of node 32 in the network dump fixture
+    assert decode_value_id_key(541671440) == (32, CommandClass.SWITCH_BINARY)
+    # Configuration parameter of node 1 in the network dump fixture
+    assert decode_value_id_key(22799473140563988) == (1, CommandClass.CONFIGURATION)
+
+
+async def test_scheduler_priorities_and_fairness(hass):
+    """Test user commands go first and nodes take turns within a lane."""
+    sent = []
+    scheduler = ZWaveCommandScheduler(
+        hass, lambda topic, payload: sent.append(payload), rate=1000
+    )
+    config = {"ValueIDKey": value_id_key(2, CommandClass.CONFIGURATION), "Value": 1}
+    scheduler.async_send(SET_VALUE, config)
+    scheduler.async_send("OpenZWave/1/command/healnetworknode/", {"node": 3})
+    switch_2 = [
+        {"ValueIDKey": value_id_key(2, CommandClass.SWITCH_BINARY), "Value": value}
+        for value in (True, False, True)
+    ]
+    for payload in switch_2:
+        scheduler.async_send(SET_VALUE, payload)
+    switch_3 = {
+        "ValueIDKey": value_id_key(3, CommandClass.SWITCH_BINARY),
+        "Value": True,
+    }
+    scheduler.async_send(SET_VALUE, switch_3)
+
+    assert sent == []
+    assert scheduler.statistics["user"]["queue_depth"] == 4
+    assert scheduler.statistics["service"]["queue_depth"] == 2
+
+    await asyncio.sleep(0.1)
+
+    assert sent == [
+        switch_2[0],
+        switch_3,
+        switch_2[1],
+        switch_2[2],
+        config,
+        {"node": 3},
+    ]
+    statistics = scheduler.statistics
+    assert statistics["user"]["sent"] == 4
+    assert statistics["user"]["queue_depth"] == 0
+    assert statistics["service"]["sent"] == 2
+    assert statistics["service"]["max_wait"] >= statistics["user"]["max_wait"]
+
+
+async def test_scheduler_unlimited(hass):
+    """Test commands are published right away without a rate limit."""
+    sent = []
+    scheduler = ZWaveCommandScheduler(hass, lambda topic, payload: sent.append(payload))
+    scheduler.async_send("OpenZWave/1/command/addnode/", {"secure": False})
+
+    assert sent == [{"secure": False}]
+    assert scheduler.statistics["service"]["sent"] == 1
+
+
+def test_latency_tracker_timeout():
+    """Test commands that are not confirmed in time are counted as timed out."""
+    tracker = ZWaveCommandLatencyTracker(timeout=0)
+    tracker.async_command_sent(
+        SET_VALUE,
+        {"ValueIDKey": value_id_key(5, CommandClass.SWITCH_BINARY), "Value": True},
+    )
+
+    statistics = tracker.statistics
+    assert statistics["pending"] == 0
+    assert statistics["nodes"][5]["timeouts"] == 1
+    assert statistics["nodes"][5]["confirmed"] == 0
@@ -1,4 +1,7 @@
 """Test Z-Wave Sensors."""
+import json
+from unittest.mock import Mock
+
 from tests.common import setup_zwave
 
 
@@ -16,3 +19,48 @@ async def test_sensor(hass, sent_messages):
     state = hass.states.get("binary_sensor.trisensor_home_security_motion_detected")
     assert state is not None
     assert state.state == "off"
+
+
+async def test_sensor_value_changed(hass, sent_messages):
+    """Test a value change only updating the entity tracking that value."""
+    receive_message = await setup_zwave(hass, "generic_network_dump.csv")
+    switch_state = hass.states.get("switch.smart_plug_switch")
+
+    # Publish fake value change on mqtt
+    receive_message(
+        Mock(
+            topic="OpenZWave/1/node/32/instance/1/commandclass/50/value/1125900448727058/",
+            payload=json.dumps(
+                {
+                    "Label": "Electric - V",
+                    "Value": 230.5,
+                    "Units": "V",
+                    "Min": 0,
+                    "Max": 0,
+                    "Type": "Decimal",
+                    "Instance": 1,
+                    "CommandClass": "COMMAND_CLASS_METER",
+                    "Index": 4,
+                    "Node": 32,
+                    "Genre": "User",
+                    "Help": "",
+                    "ValueIDKey": 1125900448727058,
+                    "ReadOnly": False,
+                    "WriteOnly": False,
+                    "ValueSet": False,
+                    "ValuePolled": False,
+                    "ChangeVerified": False,
+                    "Event": "valueChanged",
+                    "TimeStamp": 1579566943,
+                }
+            ),
+        )
+    )
+    await hass.async_block_till_done()
+
+    state = hass.states.get("sensor.smart_plug_electric_v")
+    assert state is not None
+    assert state.state == "230.5"
+
+    # Other entities of the same node are left untouched
+    assert hass.states.get("switch.smart_plug_switch") is switch_state
@@ -1,5 +1,10 @@
 """Test Z-Wave Switches."""
-from tests.common import setup_zwave
+import json
+from unittest.mock import Mock
+
+from custom_components.zwave_mqtt import DOMAIN, const
+
+from tests.common import async_capture_events, setup_zwave
 
 
 async def test_switch(hass, sent_messages):
@@ -28,3 +33,49 @@ async def test_switch(hass, sent_messages):
     msg = sent_messages[1]
     assert msg["topic"] == "OpenZWave/1/command/setvalue/"
     assert msg["payload"] == {"Value": False, "ValueIDKey": 541671440}
+
+
+async def test_switch_command_latency(hass, sent_messages):
+    """Test the round-trip latency of a command is tracked per node."""
+    receive_message = await setup_zwave(hass, "generic_network_dump.csv")
+    events = async_capture_events(hass, const.EVENT_STATISTICS)
+
+    await hass.services.async_call(
+        "switch", "turn_on", {"entity_id": "switch.smart_plug_switch"}, blocking=True
+    )
+    assert len(sent_messages) == 1
+
+    # The node reports the new value
+    receive_message(
+        Mock(
+            topic="OpenZWave/1/node/32/instance/1/commandclass/37/value/541671440/",
+            payload=json.dumps(
+                {
+                    "Label": "Switch",
+                    "Value": True,
+                    "Type": "Bool",
+                    "Instance": 1,
+                    "CommandClass": "COMMAND_CLASS_SWITCH_BINARY",
+                    "Index": 0,
+                    "Node": 32,
+                    "Genre": "User",
+                    "ValueIDKey": 541671440,
+                    "Event": "valueChanged",
+                    "TimeStamp": 1579566892,
+                }
+            ),
+        )
+    )
+    await hass.async_block_till_done()
+    assert hass.states.get("switch.smart_plug_switch").state == "on"
+
+    await hass.services.async_call(
+        DOMAIN, const.SERVICE_REPORT_STATISTICS, {}, blocking=True
+    )
+    await hass.async_block_till_done()
+
+    statistics = events[0].data["latency"]
+    assert statistics["pending"] == 0
+    assert statistics["nodes"][32]["confirmed"] == 1
+    assert statistics["nodes"][32]["timeouts"] == 0
+    assert sum(statistics["nodes"][32]["histogram"].values()) == 1
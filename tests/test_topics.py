@@ -0,0 +1,62 @@
+"""Test the planning of the MQTT subscriptions."""
+
+from custom_components.zwave_mqtt.topics import (
+    compile_topic_trie,
+    match_topic_family,
+    plan_subscriptions,
+)
+from openzwavemqtt.const import CommandClass
+
+
+def test_plan_subscriptions():
+    """Test only the consumed topic families are subscribed to."""
+    topics = plan_subscriptions("OpenZWave/")
+
+    assert "OpenZWave/#" not in topics
+    assert "OpenZWave/+/status/" in topics
+    assert "OpenZWave/+/node/+/" in topics
+    assert "OpenZWave/+/node/+/instance/+/commandclass/+/" in topics
+    assert (
+        f"OpenZWave/+/node/+/instance/+/commandclass/{CommandClass.SWITCH_BINARY.value}/value/+/"
+        in topics
+    )
+    assert (
+        f"OpenZWave/+/node/+/instance/+/commandclass/{CommandClass.VERSION.value}/value/+/"
+        not in topics
+    )
+    assert not any("statistics" in topic for topic in topics)
+    assert not any("association" in topic for topic in topics)
+
+
+def test_plan_subscriptions_statistics():
+    """Test statistics topics are only subscribed to when enabled."""
+    topics = plan_subscriptions("OpenZWave/", statistics=True)
+
+    assert "OpenZWave/+/statistics/" in topics
+    assert "OpenZWave/+/node/+/statistics/" in topics
+
+
+def test_match_topic_family():
+    """Test topics are classified by the topic family trie."""
+    trie = compile_topic_trie()
+
+    assert match_topic_family(trie, ("1", "status")) == "status"
+    assert match_topic_family(trie, ("1", "event", "valueChanged")) == "event"
+    assert match_topic_family(trie, ("1", "node", "2")) == "node"
+    assert (
+        match_topic_family(
+            trie, ("1", "node", "2", "instance", "1", "commandclass", "37")
+        )
+        == "commandclass"
+    )
+    assert (
+        match_topic_family(
+            trie,
+            ("1", "node", "2", "instance", "1", "commandclass", "37", "value", "3"),
+        )
+        == "value"
+    )
+    assert match_topic_family(trie, ("1", "statistics")) == "statistics"
+    assert match_topic_family(trie, ("1", "node", "2", "statistics")) == "statistics"
+    assert match_topic_family(trie, ("1", "node", "2", "association", "1")) is None
+    assert match_topic_family(trie, ("1", "command", "setvalue")) is None